@@ -0,0 +1,351 @@
+"""
+Microbenchmarks for Per-Request Hot Paths
+
+Measures time and memory allocation for the functions that run on every
+request, over realistic payload sizes. Results can be saved as a baseline and
+later runs compared against it, failing when a benchmark's median time or
+allocations regress past a threshold.
+
+Benchmarked functions:
+- dashboard sanitize_output (time, sysinfo, weather and aggregate payloads)
+- dashboard validate_service_url (allowed and rejected URLs)
+- dashboard fetch_service decode path (network replaced by a canned response)
+- dashboard fetch_service passthrough path and aggregate envelope encoding
+- dashboard render_template_string(HTML_TEMPLATE)
+- system-info get_system_info
+- weather get_weather on a cache hit
+
+Usage:
+    python benchmarks/bench_hot_paths.py                 # run, compare to baseline if present
+    python benchmarks/bench_hot_paths.py --save          # run and save results as the new baseline
+    python benchmarks/bench_hot_paths.py --threshold 0.1 # fail on >10% regression
+    python benchmarks/bench_hot_paths.py --filter sanitize
+
+Baselines are machine-specific: save one on the machine you compare on,
+before making the change being measured.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCH_DIR)
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+API_KEY = 'benchmark-api-key'
+
+# Calls traced per benchmark when measuring allocations
+ALLOC_CALLS = 20
+
+# Allocation growth below this many bytes is noise (dict resizes, interned
+# strings) and never counts as a regression, however large the ratio
+ALLOC_SLACK_BYTES = 256
+
+# Metrics compared against the baseline
+COMPARED_METRICS = ('median_us', 'peak_alloc_bytes', 'retained_alloc_bytes')
+
+
+# ============================================================================
+# Service Loading
+# ============================================================================
+# Every service's module is called app.py, so each is loaded under its own
+# name. Shared modules from common/ and each service's directory go on sys.path.
+
+def load_service(directory, module_name):
+    """Import <directory>/app.py as module_name."""
+    service_dir = os.path.join(PROJECT_DIR, directory)
+    sys.path.insert(0, service_dir)
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(service_dir, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_services():
+    os.environ['API_KEY'] = API_KEY
+    os.environ['LOG_ASYNC'] = 'False'
+    os.environ['WEATHER_CACHE_FILE'] = ''
+    sys.path.insert(0, os.path.join(PROJECT_DIR, 'common'))
+    return (load_service('dashboard-service', 'dashboard_app'),
+            load_service('system-info-service', 'sysinfo_app'),
+            load_service('weather-service', 'weather_app'))
+
+
+# ============================================================================
+# Realistic Payloads
+# ============================================================================
+TIME_PAYLOAD = {'service': 'time-service', 'timestamp': '2025-01-01 12:00:00'}
+
+WEATHER_PAYLOAD = {
+    'service': 'weather-service',
+    'cached': True,
+    'cache_age_seconds': 42,
+    'location': {'city': 'Haifa', 'country': 'Israel', 'latitude': 32.794, 'longitude': 34.9896},
+    'weather': {
+        'temperature_c': '21', 'temperature_f': '70', 'condition': 'Partly cloudy',
+        'humidity': '64', 'wind_speed_kmph': '13', 'feels_like_c': '21'
+    }
+}
+
+_PRESSURE = {'avg10': 0.12, 'avg60': 0.08, 'avg300': 0.05, 'total_seconds': 12.5}
+
+SYSINFO_PAYLOAD = {
+    'service': 'system-info-service',
+    'hostname': 'docker-host-01',
+    'container_hostname': '3f2a9c1b7d4e',
+    'platform': 'Linux',
+    'platform_release': '6.5.0-27-generic',
+    'platform_version': '#28~22.04.1-Ubuntu SMP PREEMPT_DYNAMIC Fri Mar 15 10:51:06 UTC 2',
+    'architecture': 'x86_64',
+    'processor': 'Unknown',
+    'python_version': '3.11.8',
+    'cpu_count': 8,
+    'cpu_count_physical': 4,
+    'memory_total_gb': 31.2,
+    'memory_available_gb': 18.7,
+    'memory_percent': 40.1,
+    'container': {
+        'cgroup_version': 2,
+        'cpu': {'quota_cores': 0.5, 'usage_seconds': 1234.5, 'nr_periods': 98765,
+                'nr_throttled': 321, 'throttled_seconds': 12.3},
+        'memory': {'limit_bytes': 536870912, 'usage_bytes': 123456789, 'percent': 23.0},
+        'pressure': {resource: {'some': dict(_PRESSURE), 'full': dict(_PRESSURE)}
+                     for resource in ('cpu', 'memory', 'io')}
+    }
+}
+
+AGGREGATE_PAYLOAD = {
+    'dashboard': 'aggregator-service',
+    'time_service': TIME_PAYLOAD,
+    'sysinfo_service': SYSINFO_PAYLOAD,
+    'weather_service': WEATHER_PAYLOAD
+}
+
+
+# ============================================================================
+# Benchmarks
+# ============================================================================
+
+def canned_response(payload):
+    """A requests.Response carrying payload as its JSON body."""
+    import requests
+    response = requests.Response()
+    response.status_code = 200
+    response.headers['Content-Type'] = 'application/json'
+    response._content = json.dumps(payload).encode('utf-8')
+    response._content_consumed = True  # As after a non-streamed download
+    return response
+
+
+def build_benchmarks(dashboard, sysinfo, weather):
+    """Return (name, callable) pairs for every benchmark."""
+    benchmarks = []
+
+    for label, payload in [('time', TIME_PAYLOAD), ('weather', WEATHER_PAYLOAD),
+                           ('sysinfo', SYSINFO_PAYLOAD), ('aggregate', AGGREGATE_PAYLOAD)]:
+        benchmarks.append((f'sanitize_output[{label}]',
+                           lambda payload=payload: dashboard.sanitize_output(payload)))
+
+    benchmarks.append(('validate_service_url[allowed]',
+                       lambda: dashboard.validate_service_url(dashboard.SYSINFO_SERVICE_URL)))
+    benchmarks.append(('validate_service_url[rejected]',
+                       lambda: dashboard.validate_service_url('http://169.254.169.254/latest/meta-data/')))
+
+    # fetch_service with the network call replaced by a canned response, so
+    # only the decode/sanitize path and metrics bookkeeping are measured
+    responses = {
+        dashboard.TIME_SERVICE_URL: canned_response(TIME_PAYLOAD),
+        dashboard.SYSINFO_SERVICE_URL: canned_response(SYSINFO_PAYLOAD),
+        dashboard.WEATHER_SERVICE_URL: canned_response(WEATHER_PAYLOAD),
+    }
+    dashboard.requests.get = lambda url, **kwargs: responses[url]
+    for label, url in [('time', dashboard.TIME_SERVICE_URL), ('sysinfo', dashboard.SYSINFO_SERVICE_URL),
+                       ('weather', dashboard.WEATHER_SERVICE_URL)]:
+        benchmarks.append((f'fetch_service[{label}]',
+                           lambda label=label, url=url: dashboard.fetch_service(
+                               label, url, 3, lambda e: {'error': e})))
+        benchmarks.append((f'fetch_service_raw[{label}]',
+                           lambda label=label, url=url: dashboard.fetch_service(
+                               label, url, 3, lambda e: {'error': e}, raw=True)))
+
+    # /api/aggregate response body: jsonify of decoded data vs spliced raw bytes
+    raw_bodies = {key: response.content for key, response in
+                  [('time_service', responses[dashboard.TIME_SERVICE_URL]),
+                   ('sysinfo_service', responses[dashboard.SYSINFO_SERVICE_URL]),
+                   ('weather_service', responses[dashboard.WEATHER_SERVICE_URL])]}
+
+    def aggregate_jsonify():
+        with dashboard.app.app_context():
+            return dashboard.jsonify(dashboard.sanitize_output(AGGREGATE_PAYLOAD))
+    benchmarks.append(('aggregate_body[jsonify]', aggregate_jsonify))
+    benchmarks.append(('aggregate_body[passthrough]',
+                       lambda: dashboard.encode_envelope({'dashboard': 'aggregator-service', **raw_bodies})))
+
+    sanitized = {key: dashboard.sanitize_output(value) for key, value in
+                 [('time', TIME_PAYLOAD), ('sysinfo', SYSINFO_PAYLOAD), ('weather', WEATHER_PAYLOAD)]}
+
+    def render_dashboard():
+        with dashboard.app.test_request_context('/'):
+            return dashboard.render_template_string(
+                dashboard.HTML_TEMPLATE,
+                time_data=sanitized['time'],
+                sysinfo_data=sanitized['sysinfo'],
+                weather_data=sanitized['weather']
+            )
+    benchmarks.append(('render_template_string[HTML_TEMPLATE]', render_dashboard))
+
+    def system_info():
+        with sysinfo.app.test_request_context('/api/sysinfo', headers={'X-API-Key': API_KEY}):
+            return sysinfo.get_system_info()
+    benchmarks.append(('get_system_info', system_info))
+
+    weather.weather_cache['data'] = {key: value for key, value in WEATHER_PAYLOAD.items()
+                                     if key not in ('cached', 'cache_age_seconds')}
+    weather.weather_cache['timestamp'] = datetime.now()
+
+    def weather_cache_hit():
+        with weather.app.test_request_context('/api/weather'):
+            return weather.get_weather()
+    benchmarks.append(('get_weather[cache_hit]', weather_cache_hit))
+
+    return benchmarks
+
+
+# ============================================================================
+# Measurement
+# ============================================================================
+
+def measure_allocations(func, calls=ALLOC_CALLS):
+    """
+    Trace the allocations of repeated calls to func.
+
+    Returns:
+        dict: peak_alloc_bytes (median over calls of the memory allocated and
+              live at once during a call), and retained_alloc_bytes and
+              retained_alloc_blocks (memory still allocated after each call,
+              from a snapshot diff averaged over all calls)
+    """
+    tracemalloc.start()
+    try:
+        peaks = []
+        before = tracemalloc.take_snapshot()
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            func()
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    # Ignore tracemalloc's own bookkeeping between the two snapshots
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), 'filename')
+    return {
+        'peak_alloc_bytes': int(statistics.median(peaks)),
+        'retained_alloc_bytes': round(sum(stat.size_diff for stat in diff) / calls),
+        'retained_alloc_blocks': round(sum(stat.count_diff for stat in diff) / calls, 1),
+    }
+
+
+def measure(func, repeat=7):
+    """
+    Time func and trace its allocations.
+
+    Returns:
+        dict: median_us, best_us (per call), loops (calls per timing sample)
+              and the allocation figures from measure_allocations()
+    """
+    func()  # Warm caches (template compilation, label children, imports)
+
+    timer = timeit.Timer(func)
+    loops, _ = timer.autorange()
+    samples = [total / loops * 1e6 for total in timer.repeat(repeat=repeat, number=loops)]
+
+    return {
+        'median_us': round(statistics.median(samples), 3),
+        'best_us': round(min(samples), 3),
+        'loops': loops,
+        **measure_allocations(func),
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare median time and allocations against a baseline.
+
+    A metric regresses when it grew by more than threshold (relative to the
+    baseline). Allocation growth under ALLOC_SLACK_BYTES is ignored.
+
+    Returns:
+        dict: Benchmark name to the list of metrics that regressed
+    """
+    regressions = {}
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        result['change'] = result['median_us'] / previous['median_us'] - 1
+        for metric in COMPARED_METRICS:
+            if metric not in previous:
+                continue
+            growth = result[metric] - previous[metric]
+            if metric != 'median_us' and growth < ALLOC_SLACK_BYTES:
+                continue
+            if growth > threshold * abs(previous[metric]):
+                regressions.setdefault(name, []).append(metric)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Microbenchmarks for per-request hot paths')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--save', action='store_true', help='Save results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.20,
+                        help='Allowed growth in median time or allocations before failing '
+                             '(default 0.20 = 20%%)')
+    parser.add_argument('--filter', default='', help='Only run benchmarks whose name contains this')
+    args = parser.parse_args()
+
+    benchmarks = [(name, func) for name, func in build_benchmarks(*load_services())
+                  if args.filter in name]
+
+    results = {}
+    for name, func in benchmarks:
+        results[name] = measure(func)
+
+    baseline = {}
+    if not args.save and os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    regressions = compare(results, baseline, args.threshold)
+
+    print(f"{'benchmark':42} {'median':>12} {'best':>12} {'peak alloc':>12} "
+          f"{'retained':>10} {'vs base':>9}")
+    for name, result in results.items():
+        change = f"{result['change']:+.1%}" if 'change' in result else '-'
+        flag = f"  REGRESSION ({', '.join(regressions[name])})" if name in regressions else ''
+        print(f"{name:42} {result['median_us']:>10.2f}us {result['best_us']:>10.2f}us "
+              f"{result['peak_alloc_bytes']:>11}B {result['retained_alloc_bytes']:>9}B "
+              f"{change:>9}{flag}")
+
+    if args.save:
+        saved = {name: {key: value for key, value in result.items() if key != 'change'}
+                 for name, result in results.items()}
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(saved, baseline_file, indent=2, sort_keys=True)
+        print(f'\nBaseline saved to {args.baseline}')
+    elif regressions:
+        print(f'\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
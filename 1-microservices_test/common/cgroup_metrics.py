@@ -0,0 +1,268 @@
+"""
+Container Resource Metrics (cgroup v2 and v1)
+
+Inside Docker, psutil reports host-wide numbers: every CPU and all RAM of the
+machine. The limits that actually apply to the container (and that gunicorn
+workers should be sized against) live in the container's cgroup.
+
+This reader reports the container's CPU quota, CPU usage and throttling,
+memory limit and usage, and pressure stall information (PSI). The control
+files are opened once and re-read with os.pread at offset 0. The kernel
+regenerates their contents on every read, so each sample costs one syscall per
+file with no path walk or open/close.
+
+Supported layouts:
+- cgroup v2 (unified hierarchy at /sys/fs/cgroup)
+- cgroup v1 (per-controller directories), with PSI taken from the unified
+  mount when the host runs a hybrid hierarchy
+"""
+
+import os
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+
+# cgroup v1 reports "no memory limit" as a huge page-aligned number
+_V1_UNLIMITED_THRESHOLD = 1 << 60
+
+# Large enough for any of the control files read here
+_READ_SIZE = 4096
+
+PSI_RESOURCES = ('cpu', 'memory', 'io')
+
+
+class CgroupReader:
+    """
+    Reads the current container's cgroup control files.
+
+    Args:
+        root (str): cgroup filesystem mount point
+    """
+
+    def __init__(self, root=CGROUP_ROOT):
+        self.root = root
+        self._fds = {}
+
+        if os.path.exists(os.path.join(root, 'cgroup.controllers')):
+            self.version = 2
+            paths = {
+                'cpu.max': 'cpu.max',
+                'cpu.stat': 'cpu.stat',
+                'memory.max': 'memory.max',
+                'memory.current': 'memory.current',
+            }
+            psi_dir = root
+        elif os.path.isdir(os.path.join(root, 'memory')) or os.path.isdir(os.path.join(root, 'cpu')):
+            self.version = 1
+            paths = {
+                'cpu.cfs_quota_us': 'cpu/cpu.cfs_quota_us',
+                'cpu.cfs_period_us': 'cpu/cpu.cfs_period_us',
+                'cpu.stat': 'cpu/cpu.stat',
+                'cpuacct.usage': 'cpuacct/cpuacct.usage',
+                'memory.limit_in_bytes': 'memory/memory.limit_in_bytes',
+                'memory.usage_in_bytes': 'memory/memory.usage_in_bytes',
+            }
+            psi_dir = os.path.join(root, 'unified')
+        else:
+            self.version = None
+            paths = {}
+            psi_dir = None
+
+        if psi_dir is not None:
+            for resource in PSI_RESOURCES:
+                paths[f'{resource}.pressure'] = os.path.join(psi_dir, f'{resource}.pressure')
+
+        for name, path in paths.items():
+            try:
+                self._fds[name] = os.open(os.path.join(root, path), os.O_RDONLY)
+            except OSError:
+                # Controller not enabled/delegated or PSI unsupported; skip it
+                pass
+
+    @property
+    def available(self):
+        """True if any cgroup control file could be opened."""
+        return bool(self._fds)
+
+    def _read(self, name):
+        """Re-read one control file from the start. Returns None if unavailable."""
+        fd = self._fds.get(name)
+        if fd is None:
+            return None
+        try:
+            return os.pread(fd, _READ_SIZE, 0).decode('ascii').strip()
+        except OSError:
+            return None
+
+    def _read_int(self, name):
+        value = self._read(name)
+        return int(value) if value and value.lstrip('-').isdigit() else None
+
+    def _read_keyed(self, name):
+        """Parse a flat "key value" file such as cpu.stat."""
+        content = self._read(name)
+        if not content:
+            return {}
+        stats = {}
+        for line in content.splitlines():
+            key, _, value = line.partition(' ')
+            if value.isdigit():
+                stats[key] = int(value)
+        return stats
+
+    def _read_pressure(self, resource):
+        """
+        Parse a PSI file into {'some': {...}, 'full': {...}} with avg10/60/300
+        as percentages and total as seconds.
+        """
+        content = self._read(f'{resource}.pressure')
+        if not content:
+            return None
+        pressure = {}
+        for line in content.splitlines():
+            kind, *fields = line.split()
+            values = dict(field.split('=') for field in fields)
+            pressure[kind] = {
+                'avg10': float(values.get('avg10', 0)),
+                'avg60': float(values.get('avg60', 0)),
+                'avg300': float(values.get('avg300', 0)),
+                'total_seconds': int(values.get('total', 0)) / 1e6,
+            }
+        return pressure
+
+    def cpu(self):
+        """
+        CPU quota, usage and throttling.
+
+        Returns:
+            dict: quota_cores (None if unlimited), usage_seconds, nr_periods,
+                  nr_throttled, throttled_seconds
+        """
+        if self.version == 2:
+            quota_cores = None
+            cpu_max = self._read('cpu.max')
+            if cpu_max:
+                quota, _, period = cpu_max.partition(' ')
+                if quota != 'max' and period:
+                    quota_cores = int(quota) / int(period)
+            stat = self._read_keyed('cpu.stat')
+            return {
+                'quota_cores': quota_cores,
+                'usage_seconds': stat['usage_usec'] / 1e6 if 'usage_usec' in stat else None,
+                'nr_periods': stat.get('nr_periods'),
+                'nr_throttled': stat.get('nr_throttled'),
+                'throttled_seconds': stat['throttled_usec'] / 1e6 if 'throttled_usec' in stat else None,
+            }
+
+        quota = self._read_int('cpu.cfs_quota_us')
+        period = self._read_int('cpu.cfs_period_us')
+        usage = self._read_int('cpuacct.usage')
+        stat = self._read_keyed('cpu.stat')
+        return {
+            'quota_cores': quota / period if quota and quota > 0 and period else None,
+            'usage_seconds': usage / 1e9 if usage is not None else None,
+            'nr_periods': stat.get('nr_periods'),
+            'nr_throttled': stat.get('nr_throttled'),
+            'throttled_seconds': stat['throttled_time'] / 1e9 if 'throttled_time' in stat else None,
+        }
+
+    def memory(self):
+        """
+        Memory limit and usage.
+
+        Returns:
+            dict: limit_bytes (None if unlimited), usage_bytes, percent (None if unlimited)
+        """
+        if self.version == 2:
+            limit_raw = self._read('memory.max')
+            limit = int(limit_raw) if limit_raw and limit_raw != 'max' else None
+            usage = self._read_int('memory.current')
+        else:
+            limit = self._read_int('memory.limit_in_bytes')
+            if limit is not None and limit >= _V1_UNLIMITED_THRESHOLD:
+                limit = None
+            usage = self._read_int('memory.usage_in_bytes')
+        return {
+            'limit_bytes': limit,
+            'usage_bytes': usage,
+            'percent': round(usage / limit * 100, 2) if limit and usage is not None else None,
+        }
+
+    def pressure(self):
+        """PSI per resource, or an empty dict when PSI is unavailable."""
+        pressure = {}
+        for resource in PSI_RESOURCES:
+            values = self._read_pressure(resource)
+            if values is not None:
+                pressure[resource] = values
+        return pressure
+
+    def snapshot(self):
+        """
+        All container resource readings in one dict, or None outside a cgroup.
+        """
+        if not self.available:
+            return None
+        return {
+            'cgroup_version': self.version,
+            'cpu': self.cpu(),
+            'memory': self.memory(),
+            'pressure': self.pressure(),
+        }
+
+
+class CgroupCollector:
+    """
+    Prometheus collector exposing CgroupReader readings at scrape time.
+
+    Args:
+        reader (CgroupReader): Reader to sample
+        prefix (str): Metric name prefix, e.g. 'system_info_service'
+    """
+
+    def __init__(self, reader, prefix):
+        self.reader = reader
+        self.prefix = f'{prefix}_container'
+
+    def collect(self):
+        if not self.reader.available:
+            return
+
+        cpu = self.reader.cpu()
+        memory = self.reader.memory()
+        p = self.prefix
+
+        if cpu['quota_cores'] is not None:
+            yield GaugeMetricFamily(f'{p}_cpu_quota_cores', 'CPU quota in cores', value=cpu['quota_cores'])
+        if cpu['usage_seconds'] is not None:
+            yield CounterMetricFamily(f'{p}_cpu_usage_seconds', 'CPU time used by the cgroup',
+                                      value=cpu['usage_seconds'])
+        if cpu['nr_periods'] is not None:
+            yield CounterMetricFamily(f'{p}_cpu_periods', 'Elapsed CFS enforcement periods',
+                                      value=cpu['nr_periods'])
+        if cpu['nr_throttled'] is not None:
+            yield CounterMetricFamily(f'{p}_cpu_throttled_periods', 'CFS periods in which the cgroup was throttled',
+                                      value=cpu['nr_throttled'])
+        if cpu['throttled_seconds'] is not None:
+            yield CounterMetricFamily(f'{p}_cpu_throttled_seconds', 'Time the cgroup was throttled',
+                                      value=cpu['throttled_seconds'])
+
+        if memory['limit_bytes'] is not None:
+            yield GaugeMetricFamily(f'{p}_memory_limit_bytes', 'Memory limit', value=memory['limit_bytes'])
+        if memory['usage_bytes'] is not None:
+            yield GaugeMetricFamily(f'{p}_memory_usage_bytes', 'Memory usage', value=memory['usage_bytes'])
+
+        pressure = self.reader.pressure()
+        if pressure:
+            avg = GaugeMetricFamily(f'{p}_pressure_avg10_percent',
+                                    'Share of the last 10s tasks stalled on a resource (PSI)',
+                                    labels=['resource', 'kind'])
+            total = CounterMetricFamily(f'{p}_pressure_stalled_seconds',
+                                        'Total time tasks stalled on a resource (PSI)',
+                                        labels=['resource', 'kind'])
+            for resource, kinds in pressure.items():
+                for kind, values in kinds.items():
+                    avg.add_metric([resource, kind], values['avg10'])
+                    total.add_metric([resource, kind], values['total_seconds'])
+            yield avg
+            yield total
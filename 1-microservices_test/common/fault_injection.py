@@ -0,0 +1,387 @@
+"""
+Fault and Latency Injection for Local Performance Testing
+
+Makes a backend misbehave in controlled ways, so the dashboard's timeout,
+fallback, hedging and caching paths can be load-tested on one machine.
+Without it, that takes code edits or cutting the network to wttr.in.
+
+Faults are configured per route (the Flask route template, e.g. /api/weather,
+or "*" for every route):
+
+    {
+      "/api/weather": {
+        "latency": {"distribution": "lognormal", "median_ms": 300, "sigma": 0.8, "rate": 1.0},
+        "error_rate": 0.05,
+        "error_status": 503,
+        "slow_body_rate": 0.1,
+        "slow_body_bytes_per_second": 256,
+        "reset_rate": 0.01
+      }
+    }
+
+Latency distributions:
+- fixed:       {"ms"}
+- uniform:     {"min_ms", "max_ms"}
+- normal:      {"mean_ms", "stddev_ms"} (clamped at 0)
+- lognormal:   {"median_ms", "sigma"} - long-tailed, like real GC pauses
+- exponential: {"mean_ms"}
+"rate" is the share of requests delayed (default 1.0).
+
+Connection resets close the client socket with SO_LINGER 0, so the client sees
+a TCP RST (gunicorn only). Under other servers the request is aborted instead.
+
+Injection is opt-in and off by default. When FAULT_INJECTION_ENABLED is not
+'True', install_fault_injection() registers nothing, so there is no per-request
+cost. Rules can be changed at runtime through /admin/faults:
+- GET lists the rules, PUT replaces them, DELETE clears them
+- Requests must send X-Admin-Key equal to FAULT_ADMIN_KEY; without that key
+  set, the endpoint is not registered
+Rules are shared by all gunicorn workers through FAULT_RULES_FILE, which each
+worker re-checks at most once per second. FAULT_RULES only seeds that file
+when it does not exist yet, so a respawned worker never reverts rules changed
+through the admin endpoint. The default file is per server (named after the
+gunicorn master's PID and start time, since in a container the master is
+always PID 1), so a restart starts again from FAULT_RULES.
+
+Environment Variables:
+    FAULT_INJECTION_ENABLED: 'True' to enable (default 'False')
+    FAULT_ADMIN_KEY: Key for the /admin/faults endpoint
+    FAULT_RULES: Initial rules as JSON
+    FAULT_RULES_FILE: Shared rules file
+                      (default <tmp>/<prefix>-faults-<master pid>-<start time>.json)
+
+Usage (before REDMiddleware, so injected faults show up in request metrics):
+    install_fault_injection(app, 'weather_service')
+"""
+
+import glob
+import hmac
+import json
+import logging
+import math
+import os
+import random
+import socket
+import struct
+import tempfile
+import time
+from flask import abort, jsonify, request
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
+
+FAULT_INJECTION_ENABLED = os.environ.get('FAULT_INJECTION_ENABLED', 'False') == 'True'
+FAULT_ADMIN_KEY = os.environ.get('FAULT_ADMIN_KEY', '')
+ADMIN_PATH = '/admin/faults'
+
+# How often each worker checks the shared rules file for changes
+RULES_RELOAD_SECONDS = 1.0
+
+# Parameters of each latency distribution, with whether each must be
+# strictly positive (True) or may be zero (False)
+LATENCY_DISTRIBUTIONS = {
+    'fixed': {'ms': False},
+    'uniform': {'min_ms': False, 'max_ms': False},
+    'normal': {'mean_ms': False, 'stddev_ms': False},
+    'lognormal': {'median_ms': True, 'sigma': False},
+    'exponential': {'mean_ms': True},
+}
+
+RATE_FIELDS = ('error_rate', 'slow_body_rate', 'reset_rate')
+RULE_FIELDS = {'latency', 'error_status', 'slow_body_bytes_per_second', *RATE_FIELDS}
+
+
+def _check_number(value, name, minimum=0, maximum=None, positive=False):
+    """Raise ValueError unless value is a finite number in range (bools are not numbers here)."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f'{name} must be a number')
+    if positive and value <= 0:
+        raise ValueError(f'{name} must be greater than 0')
+    if value < minimum or (maximum is not None and value > maximum):
+        bounds = f'between {minimum} and {maximum}' if maximum is not None else f'at least {minimum}'
+        raise ValueError(f'{name} must be {bounds}')
+
+
+def validate_rules(rules):
+    """
+    Check a rules document, so that applying it can never raise.
+
+    Raises:
+        ValueError: With a message describing the first problem found
+    """
+    if not isinstance(rules, dict):
+        raise ValueError('Rules must be an object keyed by route')
+    for route, rule in rules.items():
+        if not isinstance(rule, dict):
+            raise ValueError(f'Rule for {route} must be an object')
+        unknown = set(rule) - RULE_FIELDS
+        if unknown:
+            raise ValueError(f'Unknown fields for {route}: {", ".join(sorted(unknown))}')
+        for field in RATE_FIELDS:
+            if field in rule:
+                _check_number(rule[field], f'{route}.{field}', maximum=1)
+        if 'error_status' in rule:
+            status = rule['error_status']
+            if isinstance(status, bool) or not isinstance(status, int) or not 400 <= status <= 599:
+                raise ValueError(f'{route}.error_status must be a 4xx or 5xx code')
+        if 'slow_body_bytes_per_second' in rule:
+            _check_number(rule['slow_body_bytes_per_second'], f'{route}.slow_body_bytes_per_second',
+                          positive=True)
+
+        if 'latency' in rule:
+            _validate_latency(rule['latency'], f'{route}.latency')
+
+
+def _validate_latency(latency, name):
+    if not isinstance(latency, dict):
+        raise ValueError(f'{name} must be an object')
+    distribution = latency.get('distribution')
+    if distribution not in LATENCY_DISTRIBUTIONS:
+        raise ValueError(f'{name}.distribution must be one of {", ".join(LATENCY_DISTRIBUTIONS)}')
+    parameters = LATENCY_DISTRIBUTIONS[distribution]
+    unknown = set(latency) - set(parameters) - {'distribution', 'rate'}
+    if unknown:
+        raise ValueError(f'Unknown fields for {name}: {", ".join(sorted(unknown))}')
+    missing = [parameter for parameter in parameters if parameter not in latency]
+    if missing:
+        raise ValueError(f'{name} is missing {", ".join(missing)}')
+    for parameter, positive in parameters.items():
+        _check_number(latency[parameter], f'{name}.{parameter}', positive=positive)
+    if distribution == 'uniform' and latency['max_ms'] < latency['min_ms']:
+        raise ValueError(f'{name}.max_ms must be at least min_ms')
+    if 'rate' in latency:
+        _check_number(latency['rate'], f'{name}.rate', maximum=1)
+
+
+def sample_latency(latency):
+    """Draw one delay in seconds from a latency rule."""
+    distribution = latency['distribution']
+    if distribution == 'fixed':
+        ms = latency['ms']
+    elif distribution == 'uniform':
+        ms = random.uniform(latency['min_ms'], latency['max_ms'])
+    elif distribution == 'normal':
+        ms = random.gauss(latency['mean_ms'], latency['stddev_ms'])
+    elif distribution == 'lognormal':
+        ms = random.lognormvariate(math.log(latency['median_ms']), latency['sigma'])
+    else:
+        ms = random.expovariate(1 / latency['mean_ms'])
+    return max(ms, 0) / 1000
+
+
+def slow_body(chunks, bytes_per_second):
+    """Re-yield a response body in small pieces, paced to bytes_per_second."""
+    piece = max(1, int(bytes_per_second // 10))
+    for chunk in chunks:
+        for offset in range(0, len(chunk), piece):
+            time.sleep(piece / bytes_per_second)
+            yield chunk[offset:offset + piece]
+
+
+def _server_pid():
+    """PID of the gunicorn master when running in a worker, else this process's PID."""
+    parent = os.getppid()
+    try:
+        with open(f'/proc/{parent}/cmdline', 'rb') as cmdline:
+            if b'gunicorn' in cmdline.read():
+                return parent
+    except OSError:
+        pass
+    return os.getpid()
+
+
+def _process_start_time(pid):
+    """Start time of a process in clock ticks since boot, or None if it is not running."""
+    try:
+        with open(f'/proc/{pid}/stat', 'rb') as stat:
+            # Field 22; the command name (field 2) may contain spaces, so split after it
+            return int(stat.read().rsplit(b')', 1)[1].split()[19])
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _server_id():
+    """
+    Identify the running server by master PID and start time.
+
+    The PID alone is not enough: in a container the master is PID 1 on every
+    start, and a file left by the previous start would be taken as current.
+    """
+    pid = _server_pid()
+    return f'{pid}-{_process_start_time(pid)}'
+
+
+def _remove_dead_rules_files(prefix):
+    """Delete default rules files left by servers that are no longer running."""
+    pattern = os.path.join(tempfile.gettempdir(), f'{prefix}-faults-*.json')
+    for path in glob.glob(pattern):
+        server_id = os.path.basename(path)[len(prefix) + len('-faults-'):-len('.json')]
+        pid, _, start_time = server_id.partition('-')
+        if pid.isdigit() and str(_process_start_time(int(pid))) != start_time:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+class FaultInjector:
+    """
+    Holds the active rules and applies them to requests.
+
+    Args:
+        prefix (str): Metric name prefix, e.g. 'weather_service'
+        rules_file (str): Path of the rules file shared by all workers
+    """
+
+    def __init__(self, prefix, rules_file):
+        self.rules_file = rules_file
+        self.rules = {}
+        self._rules_mtime = None
+        self._next_reload = 0.0
+        self.injected = Counter(
+            f'{prefix}_faults_injected_total',
+            'Faults injected by the fault injection middleware',
+            ['endpoint', 'fault']
+        )
+
+    def save(self, rules):
+        """Validate rules and share them with every worker through the rules file."""
+        validate_rules(rules)
+        directory = os.path.dirname(self.rules_file) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.faults-', suffix='.tmp')
+        with os.fdopen(fd, 'w') as tmp_file:
+            json.dump(rules, tmp_file)
+        os.replace(tmp_path, self.rules_file)
+        self.rules = rules
+        self._next_reload = 0.0
+
+    def seed(self, rules):
+        """Write the initial rules, unless another process already created the rules file."""
+        validate_rules(rules)
+        try:
+            fd = os.open(self.rules_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            return
+        with os.fdopen(fd, 'w') as rules_file:
+            json.dump(rules, rules_file)
+
+    def _reload(self):
+        """Pick up rules written by another worker, at most once per interval."""
+        now = time.monotonic()
+        if now < self._next_reload:
+            return
+        self._next_reload = now + RULES_RELOAD_SECONDS
+        try:
+            mtime = os.stat(self.rules_file).st_mtime_ns
+        except OSError:
+            self.rules = {}
+            return
+        if mtime != self._rules_mtime:
+            try:
+                with open(self.rules_file) as rules_file:
+                    rules = json.load(rules_file)
+                validate_rules(rules)
+            except (OSError, TypeError, ValueError) as e:
+                logger.warning('Ignoring invalid fault rules file: %s', e)
+                return
+            self.rules = rules
+            self._rules_mtime = mtime
+
+    def _rule_for(self, route):
+        self._reload()
+        return self.rules.get(route) or self.rules.get('*')
+
+    def before_request(self):
+        """Apply latency, resets and errors before the view runs."""
+        if request.url_rule is None or request.path == ADMIN_PATH:
+            return None
+        route = request.url_rule.rule
+        rule = self._rule_for(route)
+        if not rule:
+            return None
+
+        latency = rule.get('latency')
+        if latency and random.random() < latency.get('rate', 1):
+            self.injected.labels(endpoint=route, fault='latency').inc()
+            time.sleep(sample_latency(latency))
+
+        if random.random() < rule.get('reset_rate', 0):
+            self.injected.labels(endpoint=route, fault='reset').inc()
+            self._reset_connection()
+
+        if random.random() < rule.get('error_rate', 0):
+            self.injected.labels(endpoint=route, fault='error').inc()
+            status = rule.get('error_status', 500)
+            return jsonify({'error': 'Injected fault', 'status': status}), status
+        return None
+
+    def after_request(self, response):
+        """Stream the body slowly for a share of responses."""
+        if request.url_rule is None or request.path == ADMIN_PATH:
+            return response
+        route = request.url_rule.rule
+        rule = self._rule_for(route)
+        if rule and random.random() < rule.get('slow_body_rate', 0):
+            self.injected.labels(endpoint=route, fault='slow_body').inc()
+            body = response.response
+            response.response = slow_body(body, rule.get('slow_body_bytes_per_second', 256))
+        return response
+
+    @staticmethod
+    def _reset_connection():
+        """Close the client socket with SO_LINGER 0 (TCP RST), then abort the request."""
+        client = request.environ.get('gunicorn.socket')
+        if client is not None:
+            client.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+            client.close()
+        abort(500)
+
+
+def install_fault_injection(app, prefix):
+    """
+    Register fault injection hooks and the admin endpoint on a Flask app,
+    if FAULT_INJECTION_ENABLED is set.
+
+    Returns:
+        FaultInjector: The injector, or None when injection is disabled
+    """
+    if not FAULT_INJECTION_ENABLED:
+        return None
+
+    rules_file = os.environ.get('FAULT_RULES_FILE')
+    if not rules_file:
+        _remove_dead_rules_files(prefix)
+        rules_file = os.path.join(tempfile.gettempdir(), f'{prefix}-faults-{_server_id()}.json')
+    injector = FaultInjector(prefix, rules_file)
+    initial_rules = os.environ.get('FAULT_RULES')
+    if initial_rules:
+        # Every worker runs this at import, including respawned ones; only the
+        # first may write, or a respawn would revert rules set at runtime
+        injector.seed(json.loads(initial_rules))
+
+    app.before_request(injector.before_request)
+    app.after_request(injector.after_request)
+    logger.warning('Fault injection is ENABLED for %s (rules file %s)', prefix, rules_file)
+
+    if not FAULT_ADMIN_KEY:
+        logger.warning('FAULT_ADMIN_KEY not set: %s is disabled, rules come from FAULT_RULES only', ADMIN_PATH)
+        return injector
+
+    @app.route(ADMIN_PATH, methods=['GET', 'PUT', 'DELETE'], endpoint='fault_injection_admin')
+    def fault_injection_admin():
+        """Inspect or change fault rules. Requires the X-Admin-Key header."""
+        # Compared as bytes: compare_digest rejects non-ASCII str with TypeError
+        provided = request.headers.get('X-Admin-Key', '').encode('utf-8')
+        if not hmac.compare_digest(provided, FAULT_ADMIN_KEY.encode('utf-8')):
+            return jsonify({'error': 'Unauthorized', 'message': 'Invalid admin key'}), 401
+
+        if request.method == 'PUT':
+            try:
+                injector.save(request.get_json(force=True))
+            except (TypeError, ValueError) as e:
+                return jsonify({'error': 'Bad Request', 'message': str(e)}), 400
+        elif request.method == 'DELETE':
+            injector.save({})
+        return jsonify({'rules': injector.rules})
+
+    return injector
@@ -0,0 +1,152 @@
+"""
+Gunicorn Configuration Sized From Container Limits
+
+Chooses the worker count, threads per worker and worker class from the
+container's cgroup CPU quota and memory limit, instead of hardcoding
+--workers/--threads in each Dockerfile. The layout also depends on a declared
+workload profile:
+
+- cpu:   CPU-bound handlers. One worker per core plus one, single-threaded.
+- mixed: Some CPU, some waiting. 2 x cores + 1 workers, 2 threads each.
+- io:    Mostly waiting on upstream calls (e.g. the dashboard's fan-out).
+         Few processes with many threads (gthread), or an event-loop worker
+         (gevent) when it is installed.
+
+The worker count is then capped so that workers x GUNICORN_WORKER_MEMORY_MB
+fits in 80% of the container memory limit. The chosen layout is logged at boot.
+
+Environment Variables:
+    GUNICORN_PROFILE: cpu | mixed (default) | io
+    GUNICORN_WORKER_CLASS: auto (default) | sync | gthread | gevent
+    GUNICORN_WORKERS / GUNICORN_THREADS: Explicit overrides of the computed values
+    GUNICORN_WORKER_MEMORY_MB: Expected memory per worker (default 128)
+    GUNICORN_BIND: Listen address (default 0.0.0.0:$PORT, PORT defaults to 8000)
+    GUNICORN_TIMEOUT: Worker timeout in seconds (default 30)
+
+Exports WORKER_CONCURRENCY (threads, or connections for gevent) to the workers.
+
+Usage:
+    gunicorn --config gunicorn_conf.py app:app
+"""
+
+import importlib.util
+import math
+import os
+from cgroup_metrics import CgroupReader
+
+PROFILES = ('cpu', 'mixed', 'io')
+
+# Threads per gthread worker for each profile
+PROFILE_THREADS = {'cpu': 1, 'mixed': 2, 'io': 8}
+
+# Concurrent connections per event-loop worker for the io profile
+EVENT_LOOP_CONNECTIONS = 100
+
+# Share of the memory limit the workers may use, leaving room for the master
+MEMORY_HEADROOM = 0.8
+
+
+def available_cpus(reader):
+    """CPU cores available to the container: the cgroup quota if set, else the affinity mask."""
+    quota = reader.cpu()['quota_cores'] if reader.available else None
+    if quota:
+        return quota
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def memory_limit_bytes(reader):
+    """The container's memory limit, or None if unlimited or unknown."""
+    return reader.memory()['limit_bytes'] if reader.available else None
+
+
+def choose_worker_class(profile, requested):
+    """Resolve GUNICORN_WORKER_CLASS, picking an event loop for io when gevent is installed."""
+    if requested != 'auto':
+        return requested
+    if profile == 'io' and importlib.util.find_spec('gevent') is not None:
+        return 'gevent'
+    return 'gthread' if PROFILE_THREADS[profile] > 1 else 'sync'
+
+
+def compute_layout(profile, cpus, memory_limit, worker_memory_mb, requested_class='auto'):
+    """
+    Size the worker pool.
+
+    Args:
+        profile (str): Workload profile, one of PROFILES
+        cpus (float): Available CPU cores (may be fractional)
+        memory_limit (int): Memory limit in bytes, or None
+        worker_memory_mb (int): Expected memory per worker
+        requested_class (str): GUNICORN_WORKER_CLASS value
+
+    Returns:
+        dict: workers, threads, worker_class, worker_connections, memory_cap
+              (the memory-based worker limit, or None)
+    """
+    cores = max(1, math.ceil(cpus))
+    if profile == 'cpu':
+        workers = cores + 1
+    elif profile == 'mixed':
+        workers = 2 * cores + 1
+    else:
+        workers = cores + 1
+
+    memory_cap = None
+    if memory_limit:
+        memory_cap = max(1, int(memory_limit * MEMORY_HEADROOM // (worker_memory_mb * 1024 * 1024)))
+        workers = min(workers, memory_cap)
+
+    worker_class = choose_worker_class(profile, requested_class)
+    threads = PROFILE_THREADS[profile] if worker_class == 'gthread' else 1
+
+    return {
+        'workers': workers,
+        'threads': threads,
+        'worker_class': worker_class,
+        'worker_connections': EVENT_LOOP_CONNECTIONS if worker_class == 'gevent' else None,
+        'memory_cap': memory_cap,
+    }
+
+
+_profile = os.environ.get('GUNICORN_PROFILE', 'mixed')
+if _profile not in PROFILES:
+    raise ValueError(f'GUNICORN_PROFILE must be one of {", ".join(PROFILES)}, got {_profile!r}')
+
+_reader = CgroupReader()
+_cpus = available_cpus(_reader)
+_memory_limit = memory_limit_bytes(_reader)
+_layout = compute_layout(
+    _profile, _cpus, _memory_limit,
+    int(os.environ.get('GUNICORN_WORKER_MEMORY_MB', '128')),
+    os.environ.get('GUNICORN_WORKER_CLASS', 'auto')
+)
+
+# ============================================================================
+# Gunicorn Settings
+# ============================================================================
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+workers = int(os.environ.get('GUNICORN_WORKERS', _layout['workers']))
+threads = int(os.environ.get('GUNICORN_THREADS', _layout['threads']))
+worker_class = _layout['worker_class']
+if _layout['worker_connections']:
+    worker_connections = _layout['worker_connections']
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+accesslog = '-'
+errorlog = '-'
+
+# Requests one worker can handle at once, inherited by the forked workers so
+# the app can size per-process pools and limits to match
+os.environ['WORKER_CONCURRENCY'] = str(_layout['worker_connections'] or threads)
+
+
+def on_starting(server):
+    """Log the chosen layout once, when the master starts."""
+    memory = f'{_memory_limit / (1024 ** 2):.0f} MiB' if _memory_limit else 'unlimited'
+    server.log.info(
+        'Worker layout: profile=%s cpus=%.2f memory_limit=%s -> workers=%d threads=%d '
+        'worker_class=%s%s',
+        _profile, _cpus, memory, workers, threads, worker_class,
+        f' (memory caps workers at {_layout["memory_cap"]})' if _layout['memory_cap'] else ''
+    )
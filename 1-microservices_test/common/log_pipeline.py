@@ -0,0 +1,239 @@
+"""
+Non-Blocking, Rate-Limited Logging Pipeline
+
+Keeps log I/O out of request threads. A credential-stuffing flood or a burst
+of upstream errors otherwise turns into one synchronous write per request.
+
+- Asynchronous mode: request threads put records on a bounded queue and a
+  single listener thread formats and writes them. When the queue is full the
+  record is dropped and counted instead of blocking the request.
+- Per-key suppression: records logged with extra={'event': ..., 'event_key': ...}
+  (e.g. a missing API key from one client address) are let through in a burst
+  of LOG_SUPPRESS_BURST per LOG_SUPPRESS_WINDOW seconds. Further repeats are
+  counted, not written. The first record of the next window reports how many
+  were suppressed.
+- Structured output: LOG_FORMAT=json writes one JSON object per line.
+- Gunicorn's access and error loggers are routed through the same pipeline,
+  so access logs no longer write synchronously to stdout.
+
+Exported metrics:
+- <prefix>_log_records_dropped_total - records dropped because the queue was full
+- <prefix>_log_records_suppressed_total{event} - repeated events not written
+- <prefix>_log_queue_depth - records waiting to be written
+
+Environment Variables:
+    LOG_ASYNC: 'True' (default) for queue-based logging, 'False' to write inline
+    LOG_FORMAT: 'text' (default) or 'json'
+    LOG_QUEUE_SIZE: Maximum queued records before dropping (default 10000)
+    LOG_SUPPRESS_WINDOW: Suppression window in seconds (default 60)
+    LOG_SUPPRESS_BURST: Records per key written per window (default 5)
+
+Usage (in place of logging.basicConfig):
+    configure_logging('dashboard_service')
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from prometheus_client import Counter, Gauge
+
+LOG_ASYNC = os.environ.get('LOG_ASYNC', 'True') == 'True'
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', '10000'))
+LOG_SUPPRESS_WINDOW = float(os.environ.get('LOG_SUPPRESS_WINDOW', '60'))
+LOG_SUPPRESS_BURST = int(os.environ.get('LOG_SUPPRESS_BURST', '5'))
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Gunicorn configures these loggers with its own synchronous stream handlers
+GUNICORN_LOGGERS = ('gunicorn.access', 'gunicorn.error')
+
+# Standard LogRecord attributes, excluded when collecting extra fields for JSON
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class TextFormatter(logging.Formatter):
+    """The repo's usual text format, noting suppressed repeats when present."""
+
+    def format(self, record):
+        line = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            line += f' [{suppressed} similar events suppressed]'
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including any extra fields."""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SuppressionFilter(logging.Filter):
+    """
+    Rate-limit repeated events per key.
+
+    Records without an 'event' attribute always pass. Records with one are
+    keyed by (event, event_key); at most `burst` pass per `window` seconds.
+
+    Args:
+        window (float): Suppression window in seconds
+        burst (int): Records per key allowed through per window
+        suppressed_counter (Counter): Incremented (by event) for each suppressed record
+        max_keys (int): Cap on tracked keys, so a flood from many clients
+                        cannot grow the table without bound
+    """
+
+    def __init__(self, window, burst, suppressed_counter, max_keys=10000):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        self.max_keys = max_keys
+        self._suppressed_counter = suppressed_counter
+        self._state = {}  # (event, event_key) -> [window_start, seen, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        event = getattr(record, 'event', None)
+        if event is None:
+            return True
+
+        key = (event, getattr(record, 'event_key', None))
+        now = time.monotonic()
+        with self._lock:
+            state = self._state.get(key)
+            if state is None or now - state[0] >= self.window:
+                if state is None and len(self._state) >= self.max_keys:
+                    self._evict(now)
+                # Report what the previous window held back on the first record through
+                if state is not None and state[2]:
+                    record.suppressed = state[2]
+                self._state[key] = [now, 1, 0]
+                return True
+
+            state[1] += 1
+            if state[1] <= self.burst:
+                return True
+            state[2] += 1
+
+        self._suppressed_counter.labels(event=event).inc()
+        return False
+
+    def _evict(self, now):
+        """Forget expired keys; if none have expired, start over."""
+        expired = [key for key, state in self._state.items() if now - state[0] >= self.window]
+        for key in expired:
+            del self._state[key]
+        if not expired:
+            self._state.clear()
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks the caller.
+
+    Records are queued as-is so message formatting happens on the listener
+    thread. A full queue drops the record and counts it.
+    """
+
+    def __init__(self, log_queue, dropped_counter):
+        super().__init__(log_queue)
+        self._dropped_counter = dropped_counter
+
+    def prepare(self, record):
+        # In-process queue: no pickling, so defer all formatting to the listener
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self._dropped_counter.inc()
+
+
+def configure_logging(prefix, level=logging.INFO):
+    """
+    Install the logging pipeline on the root and gunicorn loggers.
+
+    Args:
+        prefix (str): Metric name prefix, e.g. 'dashboard_service'
+        level (int): Root logger level
+
+    Returns:
+        logging.Handler: The handler records are routed through
+    """
+    dropped = Counter(
+        f'{prefix}_log_records_dropped_total',
+        'Log records dropped because the log queue was full'
+    )
+    suppressed = Counter(
+        f'{prefix}_log_records_suppressed_total',
+        'Repeated log events counted but not written',
+        ['event']
+    )
+    queue_depth = Gauge(
+        f'{prefix}_log_queue_depth',
+        'Log records waiting to be written'
+    )
+
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter() if LOG_FORMAT == 'json' else TextFormatter(TEXT_FORMAT))
+
+    if LOG_ASYNC:
+        handler = DroppingQueueHandler(None, dropped)
+        listener = _start_listener(handler, output, queue_depth)
+
+        def start_child_listener():
+            # Threads do not survive fork (gunicorn --preload). The inherited
+            # queue still holds the parent's unwritten records, and its lock may
+            # have been copied while held, so the child gets a new queue.
+            nonlocal listener
+            listener = _start_listener(handler, output, queue_depth)
+
+        atexit.register(lambda: listener.stop())
+        os.register_at_fork(after_in_child=start_child_listener)
+    else:
+        handler = output
+
+    # Filter before queueing, so suppressed records never reach the queue
+    handler.addFilter(SuppressionFilter(LOG_SUPPRESS_WINDOW, LOG_SUPPRESS_BURST, suppressed))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level)
+
+    for name in GUNICORN_LOGGERS:
+        gunicorn_logger = logging.getLogger(name)
+        if gunicorn_logger.handlers:
+            gunicorn_logger.handlers = [handler]
+            gunicorn_logger.propagate = False
+
+    return handler
+
+
+def _start_listener(handler, output, queue_depth):
+    """Point the handler at a new queue and start a listener thread writing it to output."""
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    handler.queue = log_queue
+    queue_depth.set_function(log_queue.qsize)
+    listener = QueueListener(log_queue, output)
+    listener.start()
+    return listener
@@ -0,0 +1,170 @@
+"""
+Shared RED Instrumentation Middleware
+
+Records Rate, Errors and Duration for every route and status of a Flask
+service, with the same metric names in every service:
+
+- <prefix>_http_requests_total{endpoint, method, status}
+- <prefix>_http_request_duration_seconds{endpoint, method}
+
+The middleware wraps the WSGI app, so it also sees responses that never reach
+a view function: 401s from authentication decorators, 429s from the rate
+limiter, 404s and unhandled exceptions. The endpoint label is the route
+template (e.g. /api/sysinfo), never the raw path, and methods outside the
+standard set are labelled 'other', to keep cardinality bounded.
+
+Label children are resolved ahead of time and attached to each URL rule, so
+the per-request path does not go through labels() and its lock-protected
+lookup.
+
+Duration is recorded when the server closes the response, after the last
+byte of the body has been sent, so streamed and slow bodies are timed in full.
+
+Modules in common/ are copied into each Python service image via the
+"common" build context in docker-compose.yml. To run a service outside
+Docker, put common/ on PYTHONPATH.
+
+Usage (after all routes are registered):
+    REDMiddleware(app, 'system_info_service')
+"""
+
+import time
+from flask import request, request_started
+from werkzeug.wsgi import ClosingIterator
+from prometheus_client import Counter, Histogram, REGISTRY
+
+# Methods every rule answers implicitly; not worth pre-resolving
+_IMPLICIT_METHODS = {'HEAD', 'OPTIONS'}
+
+# Status codes pre-resolved for every route. Others (401, 429, 503, ...) are
+# resolved on first occurrence and cached, so they are not exported as
+# always-zero series on routes that never return them.
+_COMMON_STATUSES = (200, 500)
+
+# WSGI environ key the matched URL rule is stashed under
+_RULE_KEY = 'red_metrics.rule'
+
+# Endpoint label used when no URL rule matched the request
+UNMATCHED_ENDPOINT = 'unmatched'
+
+# Method labels; any other request method is recorded as OTHER_METHOD
+_KNOWN_METHODS = frozenset({'GET', 'POST', 'PUT', 'DELETE', 'PATCH', 'HEAD', 'OPTIONS'})
+OTHER_METHOD = 'other'
+
+
+class RouteMetrics:
+    """
+    Pre-resolved metric children for one (endpoint, method) pair.
+
+    Status children are kept in a dict keyed by status code, filled lazily
+    for codes outside _COMMON_STATUSES.
+    """
+
+    __slots__ = ('endpoint', 'method', 'duration', '_counter', '_counts')
+
+    def __init__(self, counter, histogram, endpoint, method):
+        self.endpoint = endpoint
+        self.method = method
+        self.duration = histogram.labels(endpoint=endpoint, method=method)
+        self._counter = counter
+        self._counts = {
+            status: counter.labels(endpoint=endpoint, method=method, status=str(status))
+            for status in _COMMON_STATUSES
+        }
+
+    def observe(self, status, seconds):
+        """Record one finished request."""
+        child = self._counts.get(status)
+        if child is None:
+            child = self._counter.labels(endpoint=self.endpoint, method=self.method, status=str(status))
+            self._counts[status] = child
+        child.inc()
+        self.duration.observe(seconds)
+
+
+class REDMiddleware:
+    """
+    WSGI middleware recording request rate, errors and duration for a Flask app.
+
+    Args:
+        app (Flask): Application to instrument; its wsgi_app is wrapped in place
+        prefix (str): Metric name prefix, e.g. 'dashboard_service'
+        registry (CollectorRegistry): Prometheus registry for the metrics
+    """
+
+    def __init__(self, app, prefix, registry=REGISTRY):
+        self.requests_total = Counter(
+            f'{prefix}_http_requests_total',
+            'Total HTTP requests',
+            ['endpoint', 'method', 'status'],
+            registry=registry
+        )
+        self.request_duration = Histogram(
+            f'{prefix}_http_request_duration_seconds',
+            'HTTP request latency',
+            ['endpoint', 'method'],
+            registry=registry
+        )
+
+        for rule in app.url_map.iter_rules():
+            if rule.endpoint == 'static':
+                continue
+            rule.red_metrics = {
+                method: RouteMetrics(self.requests_total, self.request_duration, rule.rule, method)
+                for method in rule.methods - _IMPLICIT_METHODS
+            }
+        self._unmatched = {}
+
+        # request_started fires after URL matching but before any
+        # before_request hook, so the rule is known even for requests the
+        # rate limiter or HTTPS redirect answer without calling the view.
+        request_started.connect(self._remember_rule, app, weak=False)
+        self._wsgi_app = app.wsgi_app
+        app.wsgi_app = self
+
+    @staticmethod
+    def _remember_rule(sender, **extra):
+        request.environ[_RULE_KEY] = request.url_rule
+
+    def _route_metrics(self, environ):
+        """Find the pre-resolved metrics for the request described by environ."""
+        method = environ.get('REQUEST_METHOD', 'GET')
+        rule = environ.get(_RULE_KEY)
+        if rule is not None:
+            route = rule.red_metrics.get(method) if hasattr(rule, 'red_metrics') else None
+            if route is not None:
+                return route
+            endpoint = rule.rule
+        else:
+            endpoint = UNMATCHED_ENDPOINT
+
+        # Rules added after install, implicit HEAD/OPTIONS, or no match at all.
+        # The method is client-controlled here, so unknown ones share a label.
+        if method not in _KNOWN_METHODS:
+            method = OTHER_METHOD
+        key = (endpoint, method)
+        route = self._unmatched.get(key)
+        if route is None:
+            route = RouteMetrics(self.requests_total, self.request_duration, endpoint, method)
+            self._unmatched[key] = route
+        return route
+
+    def __call__(self, environ, start_response):
+        start_time = time.perf_counter()
+        status_holder = [500]
+
+        def record_status(status, headers, exc_info=None):
+            status_holder[0] = int(status[:3])
+            return start_response(status, headers, exc_info)
+
+        def record():
+            self._route_metrics(environ).observe(status_holder[0], time.perf_counter() - start_time)
+
+        try:
+            app_iter = self._wsgi_app(environ, record_status)
+        except Exception:
+            status_holder[0] = 500
+            record()
+            raise
+        # The server calls close() once the body is sent (or the client went away)
+        return ClosingIterator(app_iter, record)
@@ -0,0 +1,237 @@
+"""
+Per-Worker Process Metrics for Gunicorn
+
+Exposes the state of every process in this service's gunicorn fleet (the
+master and all of its workers) on /metrics, so memory-leaking or hot workers
+can be spotted. Any worker answering the scrape reports the whole fleet:
+
+- <prefix>_worker_resident_memory_bytes{pid, role}
+- <prefix>_worker_threads{pid, role}
+- <prefix>_worker_open_fds{pid, role}
+- <prefix>_worker_cpu_seconds_total{pid, role, mode}
+- <prefix>_worker_requests_served_total{pid, role}
+
+Process stats are gathered with psutil at scrape time and cached for
+WORKER_METRICS_CACHE_SECONDS (default 5), so frequent or concurrent scrapes do
+not repeat the /proc reads.
+
+Requests served are counted in each worker process. The count is published
+through a small memory-mapped file per worker, in a directory shared by the
+fleet, so the worker answering a scrape can read its siblings' counts.
+Counting a request is a memory write, not a syscall. Each process removes its
+counter file at exit and the last one out removes the directory. Directories
+left by fleets that were killed are removed when the next fleet starts. The
+directory is named after the master's PID and start time: in a container the
+master is PID 1 on every start, so the PID alone would match a dead fleet.
+
+When the service is not running under gunicorn (e.g. the Flask development
+server), the fleet is just the current process.
+
+Usage:
+    WorkerStatsCollector('dashboard_service').install(app)
+"""
+
+import atexit
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+from itertools import count
+from flask import request_started
+from prometheus_client import REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+import psutil
+
+WORKER_METRICS_CACHE_SECONDS = float(os.environ.get('WORKER_METRICS_CACHE_SECONDS', '5'))
+
+# One unsigned 64-bit request counter per worker file
+_COUNTER_FORMAT = 'Q'
+_COUNTER_SIZE = struct.calcsize(_COUNTER_FORMAT)
+
+
+def _find_master():
+    """Return the gunicorn master process, or the current process if there is none."""
+    current = psutil.Process()
+    parent = current.parent()
+    try:
+        if parent is not None and any('gunicorn' in part for part in parent.cmdline()):
+            return parent
+    except psutil.Error:
+        pass
+    return current
+
+
+def _fleet_id(process):
+    """Master PID and start time, in hundredths of a second since the epoch."""
+    return f'{process.pid}-{round(process.create_time() * 100)}'
+
+
+class WorkerStatsCollector:
+    """
+    Prometheus collector for per-process stats of a gunicorn fleet.
+
+    Args:
+        prefix (str): Metric name prefix, e.g. 'system_info_service'
+        cache_seconds (float): How long gathered stats are reused between scrapes
+        registry (CollectorRegistry): Registry to register the collector with
+    """
+
+    def __init__(self, prefix, cache_seconds=WORKER_METRICS_CACHE_SECONDS, registry=REGISTRY):
+        self.prefix = f'{prefix}_worker'
+        self.cache_seconds = cache_seconds
+        self._master = _find_master()
+        self._dir_prefix = f'{prefix}-workers-'
+        self._remove_dead_fleet_dirs()
+        self.stats_dir = os.path.join(tempfile.gettempdir(), self._dir_prefix + _fleet_id(self._master))
+
+        self._processes = {}  # pid -> psutil.Process, reused so cpu_times stay cheap
+        self._cached = []
+        self._cached_at = 0.0
+        self._lock = threading.Lock()
+
+        self._open_counter()
+        # With gunicorn --preload the app is imported before workers fork;
+        # each forked worker needs its own counter file.
+        os.register_at_fork(after_in_child=self._open_counter)
+        atexit.register(self._remove_counter)
+        registry.register(self)
+
+    def _remove_dead_fleet_dirs(self):
+        """Delete stats directories whose master process no longer exists."""
+        tmp_dir = tempfile.gettempdir()
+        for name in os.listdir(tmp_dir):
+            if not name.startswith(self._dir_prefix):
+                continue
+            fleet_id = name[len(self._dir_prefix):]
+            pid = fleet_id.partition('-')[0]
+            if not pid.isdigit():
+                continue
+            try:
+                alive = _fleet_id(psutil.Process(int(pid))) == fleet_id
+            except psutil.Error:
+                alive = False
+            if not alive:
+                shutil.rmtree(os.path.join(tmp_dir, name), ignore_errors=True)
+
+    def _remove_counter(self):
+        """Delete this process's counter file, and the directory if it was the last."""
+        try:
+            os.unlink(os.path.join(self.stats_dir, str(os.getpid())))
+            os.rmdir(self.stats_dir)
+        except OSError:
+            pass
+
+    def _open_counter(self):
+        """Create this process's request counter file and map it."""
+        self._pid = os.getpid()
+        # The last worker to exit removes the directory; a respawn recreates it
+        os.makedirs(self.stats_dir, exist_ok=True)
+        path = os.path.join(self.stats_dir, str(self._pid))
+        with open(path, 'wb+') as counter_file:
+            counter_file.write(b'\0' * _COUNTER_SIZE)
+            counter_file.flush()
+            self._counter_map = mmap.mmap(counter_file.fileno(), _COUNTER_SIZE)
+        self._served = count(1)
+
+    def install(self, app):
+        """Count every request the Flask app starts handling."""
+        request_started.connect(self._count_request, app, weak=False)
+        return self
+
+    def _count_request(self, sender, **extra):
+        struct.pack_into(_COUNTER_FORMAT, self._counter_map, 0, next(self._served))
+
+    def _read_served(self, pid):
+        """Read another process's served count from its counter file."""
+        if pid == self._pid:
+            return struct.unpack_from(_COUNTER_FORMAT, self._counter_map, 0)[0]
+        try:
+            with open(os.path.join(self.stats_dir, str(pid)), 'rb') as counter_file:
+                data = counter_file.read(_COUNTER_SIZE)
+        except OSError:
+            return None
+        return struct.unpack(_COUNTER_FORMAT, data)[0] if len(data) == _COUNTER_SIZE else None
+
+    def _fleet(self):
+        """Current master and worker processes, reusing psutil handles by pid."""
+        members = [self._master]
+        if self._master.pid != os.getpid():
+            try:
+                members += self._master.children()
+            except psutil.Error:
+                pass
+
+        fleet = {}
+        for process in members:
+            fleet[process.pid] = self._processes.get(process.pid, process)
+        self._processes = fleet
+        return fleet
+
+    def _remove_stale_counters(self, live_pids, snapshot_time):
+        """
+        Delete counter files left behind by workers that have exited.
+
+        Files created after the fleet snapshot belong to workers forked since
+        then, so they are left for the next scrape to judge.
+        """
+        for name in os.listdir(self.stats_dir):
+            if name.isdigit() and int(name) not in live_pids:
+                path = os.path.join(self.stats_dir, name)
+                try:
+                    if os.stat(path).st_mtime >= snapshot_time:
+                        continue
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+    def _gather(self):
+        p = self.prefix
+        rss = GaugeMetricFamily(f'{p}_resident_memory_bytes', 'Resident memory per process',
+                                labels=['pid', 'role'])
+        threads = GaugeMetricFamily(f'{p}_threads', 'Threads per process', labels=['pid', 'role'])
+        fds = GaugeMetricFamily(f'{p}_open_fds', 'Open file descriptors per process', labels=['pid', 'role'])
+        cpu = CounterMetricFamily(f'{p}_cpu_seconds', 'CPU time per process',
+                                  labels=['pid', 'role', 'mode'])
+        served = CounterMetricFamily(f'{p}_requests_served', 'Requests handled per worker',
+                                     labels=['pid', 'role'])
+
+        snapshot_time = time.time()
+        fleet = self._fleet()
+        for pid, process in fleet.items():
+            role = 'master' if process is self._master and pid != os.getpid() else 'worker'
+            labels = [str(pid), role]
+            try:
+                with process.oneshot():
+                    rss.add_metric(labels, process.memory_info().rss)
+                    threads.add_metric(labels, process.num_threads())
+                    fds.add_metric(labels, process.num_fds())
+                    cpu_times = process.cpu_times()
+            except psutil.Error:
+                continue
+            cpu.add_metric(labels + ['user'], cpu_times.user)
+            cpu.add_metric(labels + ['system'], cpu_times.system)
+
+            if role == 'worker':
+                served_count = self._read_served(pid)
+                if served_count is not None:
+                    served.add_metric(labels, served_count)
+
+        self._remove_stale_counters(fleet.keys(), snapshot_time)
+        return [rss, threads, fds, cpu, served]
+
+    def describe(self):
+        # Skip the registry's trial collect() at registration, which would
+        # otherwise gather (and cache) stats before any worker has served
+        return []
+
+    def collect(self):
+        with self._lock:
+            now = time.monotonic()
+            if not self._cached or now - self._cached_at >= self.cache_seconds:
+                self._cached = self._gather()
+                self._cached_at = now
+            cached = self._cached
+        yield from cached
@@ -0,0 +1,95 @@
+"""
+Adaptive Concurrency Limiting
+
+Admission control for the dashboard's fan-out endpoints. When backends slow
+down, requests pile up behind gunicorn's worker threads and every user waits
+until the worker timeout. This limiter instead estimates how much concurrent
+work the process can handle from observed latency and rejects anything above
+that straight away, so overload shows up as a fast 503 rather than a latency
+collapse.
+
+The limit is adjusted AIMD style (additive increase, multiplicative decrease):
+- A request that finishes within the target latency while the limiter was at
+  least half utilised grows the limit by 1/limit (about +1 per full window)
+- A request that exceeds the target latency, or fails, shrinks the limit by
+  the backoff ratio
+
+The caller decides what counts as a failure: the dashboard treats a 5xx
+response or a timed-out backend call as one.
+"""
+
+import math
+import threading
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limit driven by request latency.
+
+    Args:
+        target_latency (float): Latency in seconds above which the limit backs off
+        initial_limit (int): Starting concurrency limit
+        min_limit (int): Floor for the limit so some traffic always gets through
+        max_limit (int): Ceiling for the limit
+        backoff_ratio (float): Multiplier applied to the limit on a slow request
+    """
+
+    def __init__(self, target_latency=2.0, initial_limit=8, min_limit=1,
+                 max_limit=64, backoff_ratio=0.9):
+        self.target_latency = target_latency
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self._limit = float(initial_limit)
+        self._inflight = 0
+        self._avg_latency = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self):
+        """Current concurrency limit as a whole number of requests."""
+        return int(self._limit)
+
+    @property
+    def inflight(self):
+        """Number of requests currently admitted."""
+        return self._inflight
+
+    def try_acquire(self):
+        """
+        Admit one request if below the limit.
+
+        Returns:
+            bool: True if the request was admitted and must call release()
+        """
+        with self._lock:
+            if self._inflight >= int(self._limit):
+                return False
+            self._inflight += 1
+            return True
+
+    def release(self, latency, failed=False):
+        """
+        Finish an admitted request and adjust the limit from its outcome.
+
+        Args:
+            latency (float): Time the request took in seconds
+            failed (bool): Whether the request raised or returned a server error
+        """
+        with self._lock:
+            utilised = self._inflight >= self._limit / 2
+            self._inflight -= 1
+            self._avg_latency = latency if self._avg_latency == 0.0 else (
+                0.9 * self._avg_latency + 0.1 * latency)
+
+            if failed or latency > self.target_latency:
+                self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+            elif utilised:
+                self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+
+    def retry_after(self):
+        """
+        Suggested Retry-After value in whole seconds, based on how long
+        admitted requests are currently taking.
+        """
+        return max(1, math.ceil(self._avg_latency))
@@ -8,14 +8,17 @@ and includes Prometheus metrics for monitoring request latency and service healt
 Key features:
 - Parallel service calls using ThreadPoolExecutor for faster response times
 - Prometheus metrics collection for monitoring and alerting
+- Optional hedged requests per backend to cut tail latency (see hedging.py)
+- Adaptive concurrency limiting that sheds excess load with fast 503s (see admission.py)
+- JSON endpoints splice upstream JSON bytes into the response without re-encoding (see passthrough.py)
 - Responsive HTML dashboard with auto-updating time display
 - Fallback error handling for when backend services are unavailable
 """
 
-from flask import Flask, jsonify, render_template_string, request
+from flask import Flask, Response, g, jsonify, render_template_string, request
 import requests
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_talisman import Talisman
@@ -25,14 +28,18 @@ import html
 import os
 import secrets
 from functools import wraps
+from werkzeug.exceptions import HTTPException
 from datetime import timedelta
 import re
+from hedging import HedgePolicy, hedged_call
+from admission import AdaptiveConcurrencyLimiter
+from passthrough import UpstreamBodyError, encode_envelope, read_json_body
+from red_metrics import REDMiddleware
+from log_pipeline import configure_logging
+from worker_metrics import WorkerStatsCollector
 
 # Configure secure logging with separate loggers for security events
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+configure_logging('dashboard_service')
 logger = logging.getLogger(__name__)
 security_logger = logging.getLogger('security')
 security_logger.setLevel(logging.WARNING)
@@ -116,11 +123,15 @@ def require_api_key(f):
         auth_header = request.headers.get('X-API-Key')
 
         if not auth_header:
-            security_logger.warning(f'Missing API key from {request.remote_addr} to {request.endpoint}')
+            AUTH_FAILURES.labels(endpoint=request.endpoint, reason='missing').inc()
+            security_logger.warning('Missing API key from %s to %s', request.remote_addr, request.endpoint,
+                                    extra={'event': 'missing_api_key', 'event_key': request.remote_addr})
             return jsonify({'error': 'Unauthorized', 'message': 'API key required'}), 401
 
         if auth_header != API_KEY:
-            security_logger.warning(f'Invalid API key from {request.remote_addr} to {request.endpoint}')
+            AUTH_FAILURES.labels(endpoint=request.endpoint, reason='invalid').inc()
+            security_logger.warning('Invalid API key from %s to %s', request.remote_addr, request.endpoint,
+                                    extra={'event': 'invalid_api_key', 'event_key': request.remote_addr})
             return jsonify({'error': 'Unauthorized', 'message': 'Invalid API key'}), 401
 
         return f(*args, **kwargs)
@@ -167,13 +178,9 @@ def validate_service_url(url):
 # These metrics are collected to monitor dashboard performance and upstream
 # service health. They can be scraped by Prometheus for monitoring/alerting.
 
-# Counter: Tracks total number of HTTP requests to this service
-# Labels allow filtering by endpoint, HTTP method, and response status
-REQUEST_COUNT = Counter(
-    'dashboard_service_http_requests_total',
-    'Total HTTP requests',
-    ['endpoint', 'method', 'status']
-)
+# Request rate, errors and duration (dashboard_service_http_requests_total and
+# dashboard_service_http_request_duration_seconds) are recorded for every
+# route by the shared REDMiddleware installed at the bottom of this module.
 
 # Counter: Track authentication failures for security monitoring
 AUTH_FAILURES = Counter(
@@ -182,14 +189,6 @@ AUTH_FAILURES = Counter(
     ['endpoint', 'reason']
 )
 
-# Histogram: Measures request duration for this service's endpoints
-# Used to track API response time and identify slow endpoints
-REQUEST_DURATION = Histogram(
-    'dashboard_service_http_request_duration_seconds',
-    'HTTP request latency',
-    ['endpoint', 'method']
-)
-
 # Histogram: Measures latency when calling upstream microservices
 # Helps identify which backend service is causing slowdowns
 UPSTREAM_REQUEST_DURATION = Histogram(
@@ -198,6 +197,108 @@ UPSTREAM_REQUEST_DURATION = Histogram(
     ['service']
 )
 
+# Counter: Upstream bodies refused by the JSON passthrough, by reason
+# (content_type, size or framing)
+UPSTREAM_PASSTHROUGH_REJECTED = Counter(
+    'dashboard_service_upstream_passthrough_rejected_total',
+    'Upstream responses rejected by the JSON passthrough checks',
+    ['service', 'reason']
+)
+
+# Counter: Hedged requests sent once an upstream call passed its p95 latency
+UPSTREAM_HEDGES = Counter(
+    'dashboard_service_upstream_hedges_total',
+    'Hedged upstream requests sent',
+    ['service']
+)
+
+# Counter: Hedged requests that answered before the original request
+UPSTREAM_HEDGE_WINS = Counter(
+    'dashboard_service_upstream_hedge_wins_total',
+    'Hedged upstream requests that answered first',
+    ['service']
+)
+
+# Gauge: Current adaptive concurrency limit for page and API requests
+ADMISSION_LIMIT = Gauge(
+    'dashboard_service_admission_limit',
+    'Current adaptive concurrency limit'
+)
+
+# Gauge: Requests currently admitted by the concurrency limiter
+ADMISSION_INFLIGHT = Gauge(
+    'dashboard_service_admission_inflight',
+    'Requests currently admitted by the concurrency limiter'
+)
+
+# Counter: Requests rejected with 503 because the concurrency limit was reached
+ADMISSION_REJECTED = Counter(
+    'dashboard_service_admission_rejected_total',
+    'Requests rejected by the concurrency limiter',
+    ['endpoint']
+)
+
+# ============================================================================
+# Admission Control
+# ============================================================================
+# Page loads and aggregate API calls fan out to every backend, so they go
+# through an adaptive concurrency limiter. /health and /metrics are never
+# limited: they must keep answering while the service sheds page load so
+# orchestration and monitoring can see the overload.
+ADMISSION_ENABLED = os.environ.get('ADMISSION_ENABLED', 'True') == 'True'
+
+# The limiter is per process, so its limits default to the requests one
+# worker can actually run at once (WORKER_CONCURRENCY, exported by
+# gunicorn_conf.py). A higher limit could never be reached, and nothing would
+# be shed until the limit had decayed below the worker's thread count.
+WORKER_CONCURRENCY = int(os.environ.get('WORKER_CONCURRENCY', '2'))
+
+admission_limiter = AdaptiveConcurrencyLimiter(
+    target_latency=float(os.environ.get('ADMISSION_TARGET_LATENCY', '2.0')),
+    initial_limit=int(os.environ.get('ADMISSION_INITIAL_LIMIT', WORKER_CONCURRENCY)),
+    max_limit=int(os.environ.get('ADMISSION_MAX_LIMIT', WORKER_CONCURRENCY))
+)
+ADMISSION_LIMIT.set(admission_limiter.limit)
+
+
+def admission_control(f):
+    """
+    Decorator to shed load when the adaptive concurrency limit is reached.
+
+    Rejected requests get an immediate 503 with a Retry-After header instead
+    of queueing behind slow backend calls. An admitted request counts as failed
+    (and backs the limit off) if it returns or raises a 5xx, or if any backend
+    call timed out. Client errors such as 429s never back the limit off. Views report timeouts in g.backend_timeouts, since
+    fetch_service turns backend errors into fallback data instead of raising.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not ADMISSION_ENABLED:
+            return f(*args, **kwargs)
+
+        if not admission_limiter.try_acquire():
+            ADMISSION_REJECTED.labels(endpoint=request.path).inc()
+            response = jsonify({'error': 'Service Unavailable', 'message': 'Server is overloaded, retry later'})
+            response.status_code = 503
+            response.headers['Retry-After'] = str(admission_limiter.retry_after())
+            return response
+
+        ADMISSION_INFLIGHT.inc()
+        start_time = time.time()
+        failed = True
+        try:
+            response = app.make_response(f(*args, **kwargs))
+            failed = response.status_code >= 500 or g.get('backend_timeouts', 0) > 0
+            return response
+        except HTTPException as e:
+            failed = e.code is None or e.code >= 500
+            raise
+        finally:
+            admission_limiter.release(time.time() - start_time, failed=failed)
+            ADMISSION_INFLIGHT.dec()
+            ADMISSION_LIMIT.set(admission_limiter.limit)
+    return decorated_function
+
 # ============================================================================
 # Backend Service Configuration
 # ============================================================================
@@ -207,6 +308,48 @@ TIME_SERVICE_URL = 'http://time-service:5001/api/time'
 SYSINFO_SERVICE_URL = 'http://system-info-service:5002/api/sysinfo'
 WEATHER_SERVICE_URL = 'http://weather-service:5003/api/weather'
 
+# ============================================================================
+# JSON Passthrough Configuration
+# ============================================================================
+# When enabled, /api/aggregate and /api/time-proxy check each upstream response's
+# status, Content-Type, size and framing, then splice its bytes into the response
+# instead of decoding, HTML-escaping and re-encoding it. The HTML dashboard
+# always decodes and sanitizes. UPSTREAM_MAX_BYTES caps each upstream body.
+JSON_PASSTHROUGH = os.environ.get('JSON_PASSTHROUGH', 'True') == 'True'
+UPSTREAM_MAX_BYTES = int(os.environ.get('UPSTREAM_MAX_BYTES', str(1024 * 1024)))
+
+# ============================================================================
+# Hedged Request Configuration
+# ============================================================================
+# Hedging is opt-in per backend. HEDGE_SERVICES lists the backends to hedge
+# (e.g. "sysinfo,weather"). <NAME>_SERVICE_REPLICAS optionally lists alternate
+# replica URLs; without it the hedge goes to the same URL on a new connection.
+# HEDGE_BUDGET_PERCENT caps hedges as a percentage of primary requests.
+HEDGE_SERVICES = {name.strip() for name in os.environ.get('HEDGE_SERVICES', '').split(',') if name.strip()}
+HEDGE_BUDGET_PERCENT = float(os.environ.get('HEDGE_BUDGET_PERCENT', '5'))
+
+def _replica_urls(env_name):
+    """Parse a comma-separated replica URL list, keeping only allowed hosts."""
+    urls = [url.strip() for url in os.environ.get(env_name, '').split(',') if url.strip()]
+    return [url for url in urls if validate_service_url(url)]
+
+# Backend name for each service URL, used to look up its hedge policy and
+# label hedge metrics consistently between the HTML and JSON endpoints
+BACKEND_NAMES = {
+    TIME_SERVICE_URL: 'time',
+    SYSINFO_SERVICE_URL: 'sysinfo',
+    WEATHER_SERVICE_URL: 'weather',
+}
+
+HEDGE_POLICIES = {
+    name: HedgePolicy(
+        enabled=name in HEDGE_SERVICES,
+        replica_urls=_replica_urls(f'{name.upper()}_SERVICE_REPLICAS'),
+        budget_ratio=HEDGE_BUDGET_PERCENT / 100
+    )
+    for name in BACKEND_NAMES.values()
+}
+
 # ============================================================================
 # HTML Dashboard Template
 # ============================================================================
@@ -379,7 +522,7 @@ HTML_TEMPLATE = '''
 </html>
 '''
 
-def fetch_service(service_name, url, timeout, default_error):
+def fetch_service(service_name, url, timeout, default_error, raw=False):
     """
     Fetch data from a backend microservice with timeout and error handling.
 
@@ -392,34 +535,61 @@ def fetch_service(service_name, url, timeout, default_error):
         url (str): Full URL of the service endpoint to call
         timeout (int): Request timeout in seconds
         default_error (callable): Function to generate error response if request fails
+        raw (bool): Return the validated upstream JSON bytes instead of decoded,
+                    sanitized data (see passthrough.py)
 
     Returns:
-        tuple: (service_name, response_data) where response_data is either the JSON
-               response from the service or the error object from default_error()
+        tuple: (service_name, response_data, error) where response_data is either
+               the JSON response from the service (bytes when raw) or the error
+               object from default_error(), and error is the exception that
+               caused the fallback, or None
     """
     start_time = time.time()
     try:
         # Validate service URL to prevent SSRF
         if not validate_service_url(url):
             logger.error(f'Blocked invalid service URL: {url}')
-            return service_name, default_error('Invalid service URL')
-
-        response = requests.get(url, timeout=timeout, headers={'X-API-Key': API_KEY})
+            return service_name, default_error('Invalid service URL'), None
+
+        def send(target_url):
+            # Passthrough streams the body so read_json_body can stop at the size limit
+            return requests.get(target_url, timeout=timeout, headers={'X-API-Key': API_KEY}, stream=raw)
+
+        # Hedge slow calls when enabled for this backend (no-op otherwise)
+        backend = BACKEND_NAMES.get(url, service_name)
+        policy = HEDGE_POLICIES.get(backend)
+        if policy is not None:
+            response = hedged_call(
+                policy, send, url,
+                on_hedge=UPSTREAM_HEDGES.labels(service=backend).inc,
+                on_hedge_win=UPSTREAM_HEDGE_WINS.labels(service=backend).inc,
+                # A streamed loser holds its connection until closed
+                on_discard=lambda loser: loser.close()
+            )
+        else:
+            response = send(url)
         # Record successful request duration
         UPSTREAM_REQUEST_DURATION.labels(service=service_name).observe(time.time() - start_time)
 
+        if raw:
+            return service_name, read_json_body(response, UPSTREAM_MAX_BYTES), None
+
         # Sanitize response data to prevent XSS
         data = response.json()
         sanitized_data = sanitize_output(data)
-        return service_name, sanitized_data
+        return service_name, sanitized_data, None
     except Exception as e:
+        if isinstance(e, UpstreamBodyError):
+            UPSTREAM_PASSTHROUGH_REJECTED.labels(service=service_name, reason=e.reason).inc()
         # Record failed request duration (still important for monitoring)
         UPSTREAM_REQUEST_DURATION.labels(service=service_name).observe(time.time() - start_time)
-        logger.error(f'Service {service_name} error: {type(e).__name__}')
+        logger.error('Service %s error: %s', service_name, type(e).__name__,
+                     extra={'event': 'upstream_error', 'event_key': service_name})
         # Return generic error message without exposing internal details
-        return service_name, default_error('Service temporarily unavailable')
+        return service_name, default_error('Service temporarily unavailable'), e
 
 @app.route('/', methods=['GET'])
+@admission_control
 def dashboard():
     """
     Main dashboard endpoint that aggregates data from all backend services.
@@ -431,8 +601,6 @@ def dashboard():
     Returns:
         str: Rendered HTML dashboard with aggregated data from all services
     """
-    start_time = time.time()
-
     # Define services to call with their configurations
     # Format: (result_key, service_url, timeout_seconds, error_handler_function)
     # Each service gets a custom error handler that returns appropriate fallback data
@@ -452,12 +620,10 @@ def dashboard():
 
         # Collect results as they complete (not necessarily in submission order)
         for future in as_completed(futures):
-            service_name, data = future.result()
+            service_name, data, error = future.result()
             results[service_name] = data
-
-    # Record metrics for this dashboard request
-    REQUEST_DURATION.labels(endpoint='/', method='GET').observe(time.time() - start_time)
-    REQUEST_COUNT.labels(endpoint='/', method='GET', status='200').inc()
+            if isinstance(error, requests.Timeout):
+                g.backend_timeouts = g.get('backend_timeouts', 0) + 1
 
     # Render the HTML template with the aggregated data
     return render_template_string(
@@ -469,7 +635,8 @@ def dashboard():
 
 @app.route('/api/aggregate', methods=['GET'])
 @require_api_key
-@limiter.limit("100 per minute")
+@limiter.limit("100 per minute")  # Outside admission control: a 429 says nothing about server load
+@admission_control
 def aggregate():
     """
     API endpoint that returns aggregated data from all services in JSON format.
@@ -494,13 +661,18 @@ def aggregate():
 
     # Fetch all services in parallel
     with ThreadPoolExecutor(max_workers=3) as executor:
-        futures = {executor.submit(fetch_service, name, url, timeout, error_handler): name
+        futures = {executor.submit(fetch_service, name, url, timeout, error_handler, JSON_PASSTHROUGH): name
                    for name, url, timeout, error_handler in services}
 
         for future in as_completed(futures):
-            service_name, data = future.result()
+            service_name, data, error = future.result()
             results[service_name] = data
+            if isinstance(error, requests.Timeout):
+                g.backend_timeouts = g.get('backend_timeouts', 0) + 1
 
+    if JSON_PASSTHROUGH:
+        # Upstream bodies arrive as validated JSON bytes; splice them in
+        return Response(encode_envelope(results), mimetype='application/json')
     return jsonify(results)
 
 @app.route('/api/time-proxy', methods=['GET'])
@@ -510,15 +682,21 @@ def time_proxy():
 
     This endpoint is called by JavaScript on the dashboard page to update
     the time display every second. Uses a short 2-second timeout for
-    responsiveness.
+    responsiveness. With JSON_PASSTHROUGH the time service's body is
+    returned as-is once its status, Content-Type, size and framing are checked.
 
     Returns:
         Response: JSON from time service, or error message with 500 status
     """
     try:
-        time_response = requests.get(TIME_SERVICE_URL, timeout=2)
+        time_response = requests.get(TIME_SERVICE_URL, timeout=2, headers={'X-API-Key': API_KEY},
+                                     stream=JSON_PASSTHROUGH)
+        if JSON_PASSTHROUGH:
+            return Response(read_json_body(time_response, UPSTREAM_MAX_BYTES), mimetype='application/json')
         return jsonify(time_response.json())
     except Exception as e:
+        if isinstance(e, UpstreamBodyError):
+            UPSTREAM_PASSTHROUGH_REJECTED.labels(service='time', reason=e.reason).inc()
         return jsonify({'service': 'time-service', 'timestamp': f'Error: {str(e)}'}), 500
 
 @app.route('/health', methods=['GET'])
@@ -549,6 +727,18 @@ def metrics():
     """
     return generate_latest(), 200, {'Content-Type': CONTENT_TYPE_LATEST}
 
+# ============================================================================
+# Request Instrumentation
+# ============================================================================
+# Installed after all routes are registered so every route's metric children
+# are resolved up front. Records rate, errors and duration for every response,
+# including auth failures, rate-limit rejections and exceptions.
+REDMiddleware(app, 'dashboard_service')
+
+# Per-worker RSS, threads, open fds, CPU time and requests served for the
+# whole gunicorn fleet, cached between scrapes (see common/worker_metrics.py)
+WorkerStatsCollector('dashboard_service').install(app)
+
 # ============================================================================
 # Application Entry Point
 # ============================================================================
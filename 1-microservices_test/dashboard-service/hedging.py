@@ -0,0 +1,191 @@
+"""
+Hedged Upstream Requests
+
+Tail-latency reduction for the dashboard's backend calls. A single slow replica
+or a GC pause on a backend normally sets the dashboard's p99, because each
+backend call waits out its full timeout. With hedging enabled, once a request
+has been outstanding longer than the backend's observed p95, a duplicate is
+sent to another replica (or over a fresh connection to the same one) and
+whichever answers first wins.
+
+Extra load is capped by a token budget: every primary request earns a fraction
+of a token (the budget ratio, e.g. 0.05 for 5%) and every hedge spends one
+whole token, so hedges can never exceed that fraction of primary traffic.
+"""
+
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class LatencyTracker:
+    """
+    Sliding window of recent request latencies for one backend.
+
+    Keeps the window sorted alongside insertion order so percentile lookups
+    are a single index operation instead of a sort per request.
+    """
+
+    def __init__(self, window_size=200):
+        self._window = deque()
+        self._sorted = []
+        self._window_size = window_size
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        """Record one completed request latency in seconds."""
+        with self._lock:
+            if len(self._window) >= self._window_size:
+                oldest = self._window.popleft()
+                del self._sorted[bisect.bisect_left(self._sorted, oldest)]
+            self._window.append(seconds)
+            bisect.insort(self._sorted, seconds)
+
+    def percentile(self, quantile):
+        """
+        Return the latency at the given quantile (0.0-1.0), or None when no
+        samples have been observed yet.
+        """
+        with self._lock:
+            if not self._sorted:
+                return None
+            index = min(int(quantile * len(self._sorted)), len(self._sorted) - 1)
+            return self._sorted[index]
+
+    def __len__(self):
+        return len(self._window)
+
+
+class HedgePolicy:
+    """
+    Per-backend hedging configuration and state.
+
+    Args:
+        enabled (bool): Whether hedged requests are sent for this backend
+        replica_urls (list): Alternate URLs to send hedges to. When empty, the
+                             hedge goes to the primary URL over a new connection.
+        budget_ratio (float): Maximum hedges as a fraction of primary requests
+        quantile (float): Latency quantile after which a hedge is sent (0.95 = p95)
+        min_samples (int): Observations required before hedging starts, so the
+                           delay is based on real data and not a cold window
+        min_delay (float): Lower bound on the hedge delay in seconds
+        max_tokens (float): Maximum banked hedge tokens, limits hedge bursts
+    """
+
+    def __init__(self, enabled=False, replica_urls=None, budget_ratio=0.05,
+                 quantile=0.95, min_samples=20, min_delay=0.01, max_tokens=10.0):
+        self.enabled = enabled
+        self.replica_urls = list(replica_urls or [])
+        self.budget_ratio = budget_ratio
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_tokens = max_tokens
+        self.latency = LatencyTracker()
+        self._tokens = 0.0
+        self._next_replica = 0
+        self._lock = threading.Lock()
+
+    def hedge_delay(self):
+        """
+        Return how long to wait on the primary before hedging, or None if the
+        latency window is not warm enough to hedge yet.
+        """
+        if len(self.latency) < self.min_samples:
+            return None
+        observed = self.latency.percentile(self.quantile)
+        return max(observed, self.min_delay)
+
+    def record_primary(self):
+        """Earn budget for one primary request."""
+        with self._lock:
+            self._tokens = min(self._tokens + self.budget_ratio, self.max_tokens)
+
+    def try_acquire_hedge(self):
+        """Spend one token on a hedge. Returns False when the budget is exhausted."""
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+    def hedge_url(self, primary_url):
+        """Pick the target for the next hedge, rotating through replicas."""
+        if not self.replica_urls:
+            return primary_url
+        with self._lock:
+            url = self.replica_urls[self._next_replica % len(self.replica_urls)]
+            self._next_replica += 1
+        return url
+
+
+# Attempts run on their own pool so a hedge never waits behind the caller's
+# executor. Sized for the dashboard's fan-out: every request a worker handles
+# concurrently (WORKER_CONCURRENCY, exported by gunicorn_conf.py) can call 3
+# backends, each with a primary and a hedge. A smaller pool would queue
+# primaries and make hedges wait behind the calls they are meant to outrun.
+# HEDGE_POOL_SIZE overrides the computed size.
+BACKENDS_PER_REQUEST = 3
+WORKER_CONCURRENCY = int(os.environ.get('WORKER_CONCURRENCY', '2'))
+HEDGE_POOL_SIZE = int(os.environ.get('HEDGE_POOL_SIZE', WORKER_CONCURRENCY * BACKENDS_PER_REQUEST * 2))
+_attempt_executor = ThreadPoolExecutor(max_workers=HEDGE_POOL_SIZE, thread_name_prefix='hedge')
+
+
+def hedged_call(policy, send, url, on_hedge=None, on_hedge_win=None, on_discard=None):
+    """
+    Call send(url), hedging to a second target once the primary is slow.
+
+    Args:
+        policy (HedgePolicy): Backend policy; latency is recorded into it
+        send (callable): Performs the request for a URL and returns its result.
+                         Exceptions are treated as a failed attempt.
+        url (str): Primary URL
+        on_hedge (callable): Invoked when a hedge is sent
+        on_hedge_win (callable): Invoked when the hedge answers first
+        on_discard (callable): Invoked with the result of an attempt that
+                               succeeded but lost the race, e.g. to close a
+                               streamed response. Runs once that attempt ends.
+
+    Returns:
+        The result of the first attempt to succeed. If every attempt fails,
+        the primary's exception is raised.
+    """
+    start_time = time.time()
+
+    if not policy.enabled:
+        result = send(url)
+        policy.latency.observe(time.time() - start_time)
+        return result
+
+    policy.record_primary()
+    delay = policy.hedge_delay()
+    primary = _attempt_executor.submit(send, url)
+
+    done, _ = wait([primary], timeout=delay)
+    if done or delay is None or not policy.try_acquire_hedge():
+        result = primary.result()
+        policy.latency.observe(time.time() - start_time)
+        return result
+
+    if on_hedge:
+        on_hedge()
+    hedge = _attempt_executor.submit(send, policy.hedge_url(url))
+    pending = {primary, hedge}
+
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is hedge and on_hedge_win:
+                    on_hedge_win()
+                if on_discard:
+                    loser = hedge if future is primary else primary
+                    loser.add_done_callback(lambda f: f.exception() is None and on_discard(f.result()))
+                policy.latency.observe(time.time() - start_time)
+                return future.result()
+
+    # Both attempts failed; surface the primary's error like an unhedged call
+    return primary.result()
@@ -0,0 +1,108 @@
+"""
+Raw JSON Passthrough for Upstream Responses
+
+The JSON endpoints (/api/aggregate and /api/time-proxy) used to decode every
+upstream body into Python objects, HTML-escape every string and encode it all
+again. A JSON API served as application/json does not need HTML escaping, and
+the dashboard's JavaScript writes values with textContent. In passthrough mode
+each upstream body is checked cheaply instead, and its bytes are spliced
+straight into the response envelope:
+
+- The status must be 2xx, so an upstream error body is never passed off as
+  a successful response
+- Content-Type must be application/json, with a UTF-8 charset or none
+- The body must not exceed the size limit: Content-Length is checked first,
+  then the streamed body is read only up to the limit
+- The body must be a JSON object: its first non-whitespace byte is '{' and
+  its last is '}'
+
+This is a framing check, not full JSON validation. The upstreams are our own
+services on the internal network, and the envelope stays well formed as long
+as each spliced body is itself a well-formed object.
+"""
+
+import json
+
+# Same separators as Flask's jsonify in production (compact output)
+_SEPARATORS = (',', ':')
+_READ_CHUNK_SIZE = 16 * 1024
+_WHITESPACE = b' \t\r\n'
+
+
+class UpstreamBodyError(ValueError):
+    """An upstream body that cannot be passed through; reason is a metric label."""
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+
+def read_json_body(response, max_bytes):
+    """
+    Validate an upstream response and return its raw JSON object bytes.
+
+    The response should be requested with stream=True so that an oversized
+    body is abandoned at max_bytes instead of downloaded in full. The
+    response is closed before returning.
+
+    Args:
+        response (requests.Response): Upstream response
+        max_bytes (int): Largest body accepted
+
+    Returns:
+        bytes: The body, stripped of surrounding whitespace
+
+    Raises:
+        UpstreamBodyError: If the status, content type, size or framing is wrong
+    """
+    try:
+        return _read_json_body(response, max_bytes)
+    finally:
+        response.close()
+
+
+def _read_json_body(response, max_bytes):
+    if not 200 <= response.status_code < 300:
+        raise UpstreamBodyError('status', f'Upstream returned HTTP {response.status_code}')
+
+    media_type, _, params = response.headers.get('Content-Type', '').partition(';')
+    if media_type.strip().lower() != 'application/json':
+        raise UpstreamBodyError('content_type', f'Unexpected content type {media_type!r}')
+    charset = params.strip().lower()
+    if charset and charset.replace(' ', '') not in ('charset=utf-8', 'charset=utf8'):
+        raise UpstreamBodyError('content_type', f'Unexpected charset {charset!r}')
+
+    declared = response.headers.get('Content-Length')
+    if declared is not None and declared.isdigit() and int(declared) > max_bytes:
+        raise UpstreamBodyError('size', f'Body of {declared} bytes exceeds {max_bytes}')
+    body = bytearray()
+    for chunk in response.iter_content(_READ_CHUNK_SIZE):
+        body += chunk
+        if len(body) > max_bytes:
+            raise UpstreamBodyError('size', f'Body exceeds {max_bytes} bytes')
+
+    body = bytes(body.strip(_WHITESPACE))
+    if not (body.startswith(b'{') and body.endswith(b'}')):
+        raise UpstreamBodyError('framing', 'Body is not a JSON object')
+    return body
+
+
+def encode_envelope(fields):
+    """
+    Encode a JSON object whose values may be raw JSON bytes.
+
+    Args:
+        fields (dict): Key to value. bytes values are spliced in as-is, and
+                       anything else is JSON-encoded. Keys are sorted, as
+                       jsonify does.
+
+    Returns:
+        bytes: The encoded object
+    """
+    parts = []
+    for key in sorted(fields):
+        value = fields[key]
+        if not isinstance(value, bytes):
+            value = json.dumps(value, separators=_SEPARATORS).encode('utf-8')
+        parts.append(json.dumps(key).encode('utf-8') + b':' + value)
+    return b'{' + b','.join(parts) + b'}'
@@ -9,9 +9,11 @@ The service is useful for:
 - Monitoring infrastructure and resource utilization
 - Debugging deployment issues (hostname, platform info)
 - Capacity planning (CPU cores, memory availability)
+- Sizing workers against the container's cgroup CPU quota and memory limit
 - Verifying container configurations
 
-Includes Prometheus metrics for monitoring request patterns and latency.
+Includes Prometheus metrics for monitoring request patterns and latency,
+recorded for every route by the shared REDMiddleware.
 """
 
 from flask import Flask, jsonify, request
@@ -19,17 +21,18 @@ import socket
 import platform
 import os
 import psutil
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
-import time
+from prometheus_client import Counter, REGISTRY, generate_latest, CONTENT_TYPE_LATEST
+from red_metrics import REDMiddleware
+from log_pipeline import configure_logging
+from worker_metrics import WorkerStatsCollector
+from cgroup_metrics import CgroupReader, CgroupCollector
+from fault_injection import install_fault_injection
 import logging
 import re
 from functools import wraps
 
 # Configure logging with security events
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+configure_logging('system_info_service')
 logger = logging.getLogger(__name__)
 security_logger = logging.getLogger('security')
 security_logger.setLevel(logging.WARNING)
@@ -59,11 +62,15 @@ def require_api_key(f):
         auth_header = request.headers.get('X-API-Key')
 
         if not auth_header:
-            security_logger.warning(f'Missing API key from {request.remote_addr} to {request.endpoint}')
+            AUTH_FAILURES.labels(endpoint=request.endpoint, reason='missing').inc()
+            security_logger.warning('Missing API key from %s to %s', request.remote_addr, request.endpoint,
+                                    extra={'event': 'missing_api_key', 'event_key': request.remote_addr})
             return jsonify({'error': 'Unauthorized', 'message': 'API key required'}), 401
 
         if auth_header != API_KEY:
-            security_logger.warning(f'Invalid API key from {request.remote_addr} to {request.endpoint}')
+            AUTH_FAILURES.labels(endpoint=request.endpoint, reason='invalid').inc()
+            security_logger.warning('Invalid API key from %s to %s', request.remote_addr, request.endpoint,
+                                    extra={'event': 'invalid_api_key', 'event_key': request.remote_addr})
             return jsonify({'error': 'Unauthorized', 'message': 'Invalid API key'}), 401
 
         return f(*args, **kwargs)
@@ -102,21 +109,9 @@ def add_security_headers(response):
 # ============================================================================
 # These metrics track HTTP request patterns and performance for this service.
 
-# Counter: Tracks total number of HTTP requests
-# Labels allow filtering by endpoint, HTTP method, and response status
-REQUEST_COUNT = Counter(
-    'system_info_service_http_requests_total',
-    'Total HTTP requests',
-    ['endpoint', 'method', 'status']
-)
-
-# Histogram: Measures request duration distribution
-# Used to identify slow endpoints and track API performance
-REQUEST_DURATION = Histogram(
-    'system_info_service_http_request_duration_seconds',
-    'HTTP request latency',
-    ['endpoint', 'method']
-)
+# Request rate, errors and duration (system_info_service_http_requests_total and
+# system_info_service_http_request_duration_seconds) are recorded for every
+# route by the shared REDMiddleware installed at the bottom of this module.
 
 # Counter: Track authentication failures
 AUTH_FAILURES = Counter(
@@ -125,6 +120,17 @@ AUTH_FAILURES = Counter(
     ['endpoint', 'reason']
 )
 
+# ============================================================================
+# Container Resource Metrics
+# ============================================================================
+# psutil reports host-wide CPU and memory; the container's real limits come
+# from its cgroup (common/cgroup_metrics.py, also used to size gunicorn).
+# The reader keeps the control files open and is sampled on each
+# /api/sysinfo request and each Prometheus scrape
+# (system_info_service_container_* metrics).
+cgroup_reader = CgroupReader()
+REGISTRY.register(CgroupCollector(cgroup_reader, 'system_info_service'))
+
 @app.route('/api/sysinfo', methods=['GET'])
 @require_api_key
 def get_system_info():
@@ -141,6 +147,9 @@ def get_system_info():
     - Platform details (OS type, version, architecture)
     - CPU information (logical and physical core counts)
     - Memory statistics (total, available, usage percentage)
+    - Container resources from the cgroup: CPU quota, usage and throttling,
+      memory limit and usage, and pressure stall information (None outside
+      a cgroup)
     - Python environment version
     - Host and container hostnames
 
@@ -152,14 +161,15 @@ def get_system_info():
     Returns:
         Response: JSON object with comprehensive system information
     """
-    start_time = time.time()
-
     # Get host hostname from environment variable, or fall back to container hostname
     # Docker Compose can set HOST_HOSTNAME to the actual host machine name
     # Sanitize hostnames to prevent injection attacks
     hostname = sanitize_hostname(os.environ.get('HOST_HOSTNAME', socket.gethostname()))
     container_hostname = sanitize_hostname(socket.gethostname())
 
+    # Host-wide memory figures (read once, /proc/meminfo is parsed per call)
+    virtual_memory = psutil.virtual_memory()
+
     # Gather detailed system information using platform and psutil libraries
     system_info = {
         'service': 'system-info-service',
@@ -173,16 +183,12 @@ def get_system_info():
         'python_version': platform.python_version(),  # Python interpreter version
         'cpu_count': psutil.cpu_count(logical=True),  # Logical CPU cores (with hyperthreading)
         'cpu_count_physical': psutil.cpu_count(logical=False),  # Physical CPU cores
-        'memory_total_gb': round(psutil.virtual_memory().total / (1024**3), 2),  # Total RAM in GB
-        'memory_available_gb': round(psutil.virtual_memory().available / (1024**3), 2),  # Available RAM in GB
-        'memory_percent': psutil.virtual_memory().percent  # Memory usage percentage
+        'memory_total_gb': round(virtual_memory.total / (1024**3), 2),  # Total RAM in GB
+        'memory_available_gb': round(virtual_memory.available / (1024**3), 2),  # Available RAM in GB
+        'memory_percent': virtual_memory.percent,  # Memory usage percentage
+        'container': cgroup_reader.snapshot()  # Container limits and usage from the cgroup
     }
 
-    # Record performance metrics
-    duration = time.time() - start_time
-    REQUEST_DURATION.labels(endpoint='/api/sysinfo', method='GET').observe(duration)
-    REQUEST_COUNT.labels(endpoint='/api/sysinfo', method='GET', status='200').inc()
-
     return jsonify(system_info)
 
 @app.route('/health', methods=['GET'])
@@ -212,6 +218,21 @@ def metrics():
     """
     return generate_latest(), 200, {'Content-Type': CONTENT_TYPE_LATEST}
 
+# ============================================================================
+# Request Instrumentation
+# ============================================================================
+# Opt-in fault injection for load tests, counted by REDMiddleware below
+install_fault_injection(app, 'system_info_service')
+
+# Installed after all routes are registered so every route's metric children
+# are resolved up front. Records rate, errors and duration for every response,
+# including auth failures, rate-limit rejections and exceptions.
+REDMiddleware(app, 'system_info_service')
+
+# Per-worker RSS, threads, open fds, CPU time and requests served for the
+# whole gunicorn fleet, cached between scrapes (see common/worker_metrics.py)
+WorkerStatsCollector('system_info_service').install(app)
+
 # ============================================================================
 # Application Entry Point
 # ============================================================================
@@ -1,5 +1,8 @@
 from flask import Flask, jsonify
 from datetime import datetime
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from red_metrics import REDMiddleware
+from fault_injection import install_fault_injection
 
 app = Flask(__name__)
 
@@ -15,5 +18,15 @@ def get_time():
 def health():
     return jsonify({'status': 'healthy'})
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return generate_latest(), 200, {'Content-Type': CONTENT_TYPE_LATEST}
+
+# Opt-in fault injection for local load tests (see common/fault_injection.py)
+install_fault_injection(app, 'time_service')
+
+# Same metric names as the Go implementation (time_service_http_*)
+REDMiddleware(app, 'time_service')
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5001)
@@ -9,6 +9,11 @@ Features:
 - 10-minute cache duration for weather data to reduce API calls
 - Fallback to stale cache during API errors (graceful degradation)
 - Uses certifi for reliable SSL certificate verification
+- Cache persisted to a snapshot file so restarts and new workers start warm
+- Record/replay mode for the wttr.in upstream for offline benchmarking
+- Lean upstream decoding that stops reading after current_condition
+- Prometheus metrics for request latency by cache outcome, wttr.in latency
+  and payload size, cache age and refresh concurrency
 - Simple and lightweight Python implementation
 
 This is a Python alternative to the Node.js weather service (server.js).
@@ -17,9 +22,26 @@ This is a Python alternative to the Node.js weather service (server.js).
 from flask import Flask, jsonify
 import requests
 import certifi
+import fcntl
 import socket
+import json
+import os
+import tempfile
+import threading
+import time
+import logging
+import tracemalloc
+from contextlib import contextmanager
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from red_metrics import REDMiddleware
+from log_pipeline import configure_logging
+from fault_injection import install_fault_injection
 from datetime import datetime, timedelta
 
+# See common/log_pipeline.py
+configure_logging('weather_service')
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
 
 # ============================================================================
@@ -30,9 +52,232 @@ app = Flask(__name__)
 weather_cache = {
     'data': None,  # Cached weather data dictionary
     'timestamp': None,  # datetime object when data was cached
-    'cache_duration_minutes': 10  # Cache validity duration (10 minutes)
+    'cache_duration_minutes': 10,  # Cache validity duration (10 minutes)
+    'snapshot_mtime': None  # Modification time of the snapshot last read or written
 }
 
+# Snapshot file the cache is persisted to, so restarts and new gunicorn
+# workers start warm instead of each blocking on a wttr.in call. Workers also
+# pick up each other's refreshes through it. The default is under the temp
+# directory, which a redeploy usually wipes; to survive one, point
+# WEATHER_CACHE_FILE at a persistent volume. Set it to an empty string to
+# disable persistence.
+CACHE_SNAPSHOT_FILE = os.environ.get(
+    'WEATHER_CACHE_FILE', os.path.join(tempfile.gettempdir(), 'weather-cache.json'))
+
+
+class RefreshLock:
+    """
+    Lets one refresh run at a time across all gunicorn workers.
+
+    A thread lock covers this process's request threads, and an exclusive
+    flock on a file next to the snapshot covers the other workers. Without a
+    snapshot file only the thread lock is used.
+
+    Args:
+        path (str): Lock file path, or '' for a per-process lock
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._thread_lock = threading.Lock()
+        self._fd = None
+
+    def acquire(self, blocking=True):
+        """Take the lock. Returns False if blocking is False and it is held elsewhere."""
+        if not self._thread_lock.acquire(blocking):
+            return False
+        if not self._path:
+            return True
+        try:
+            fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError as e:
+            logger.warning('Refresh lock file unavailable, locking per process: %s', e)
+            return True
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            self._thread_lock.release()
+            return False
+        self._fd = fd
+        return True
+
+    def release(self):
+        """Release the lock; closing the file drops the flock."""
+        if self._fd is not None:
+            fd, self._fd = self._fd, None
+            os.close(fd)
+        self._thread_lock.release()
+
+
+# Only one request refreshes an expired cache at a time; others keep serving
+# the last-known data while it runs.
+refresh_lock = RefreshLock(CACHE_SNAPSHOT_FILE and CACHE_SNAPSHOT_FILE + '.lock')
+
+# ============================================================================
+# Upstream Record/Replay Configuration
+# ============================================================================
+# WEATHER_UPSTREAM_MODE controls how wttr.in is reached:
+# - live:   call wttr.in (default)
+# - record: call wttr.in and save each response body to WEATHER_RECORDING_FILE
+# - replay: serve the saved body instead of calling wttr.in, after
+#           WEATHER_REPLAY_LATENCY seconds; fails like an outage if no recording exists
+# - outage: fail every upstream call, to exercise the stale-cache path
+# This lets the warm-start path and wttr.in outages be benchmarked offline.
+UPSTREAM_MODE = os.environ.get('WEATHER_UPSTREAM_MODE', 'live')
+RECORDING_FILE = os.environ.get(
+    'WEATHER_RECORDING_FILE', os.path.join(tempfile.gettempdir(), 'weather-upstream.json'))
+REPLAY_LATENCY = float(os.environ.get('WEATHER_REPLAY_LATENCY', '0'))
+
+WEATHER_URL = 'https://wttr.in/Haifa,Israel?format=j1'
+
+# ============================================================================
+# Upstream Decoding Configuration
+# ============================================================================
+# Lean fetch streams the j1 document and stops once current_condition has been
+# decoded, instead of downloading and building the multi-day forecast tree.
+LEAN_FETCH = os.environ.get('WEATHER_LEAN_FETCH', 'True') == 'True'
+# tracemalloc traces every thread in the process while it runs, so it is off
+# by default and, when enabled, only runs around the decode steps themselves
+TRACE_DECODE_MEMORY = os.environ.get('WEATHER_TRACE_DECODE_MEMORY', 'False') == 'True'
+UPSTREAM_CHUNK_SIZE = 4096
+CURRENT_CONDITION_KEY = b'"current_condition"'
+json_decoder = json.JSONDecoder()
+
+# ============================================================================
+# Prometheus Metrics Configuration
+# ============================================================================
+# Histogram: Bytes read from wttr.in per refresh (lower with lean fetch)
+UPSTREAM_RESPONSE_BYTES = Histogram(
+    'weather_service_upstream_response_bytes',
+    'Bytes read from wttr.in per cache refresh',
+    buckets=(1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072)
+)
+
+# Histogram: CPU time spent decoding the wttr.in document per refresh
+UPSTREAM_DECODE_DURATION = Histogram(
+    'weather_service_upstream_decode_seconds',
+    'Time spent decoding the wttr.in response per cache refresh',
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+)
+
+# Gauge: Peak traced memory while decoding during the most recent refresh
+# (only with WEATHER_TRACE_DECODE_MEMORY=True)
+UPSTREAM_DECODE_PEAK_MEMORY = Gauge(
+    'weather_service_upstream_decode_peak_memory_bytes',
+    'Peak traced memory while decoding during the most recent cache refresh'
+)
+
+# Request rate, errors and duration (weather_service_http_requests_total and
+# weather_service_http_request_duration_seconds) are recorded for every
+# route by the shared REDMiddleware installed at the bottom of this module.
+
+# Histogram: Weather request latency split by how it was answered
+# fresh = fetched from wttr.in, cached = valid cache, stale = expired cache,
+# error = no data available. Separates upstream cost from handler cost.
+WEATHER_REQUEST_DURATION = Histogram(
+    'weather_service_weather_request_duration_seconds',
+    'Weather request latency by cache outcome',
+    ['cache']
+)
+
+# Counters: Cache effectiveness (used by the LowCacheHitRate alert)
+CACHE_HITS = Counter(
+    'weather_service_cache_hits_total',
+    'Requests answered from valid cache'
+)
+CACHE_MISSES = Counter(
+    'weather_service_cache_misses_total',
+    'Requests that found the cache expired or empty'
+)
+
+# Histogram: wttr.in call latency, including reading the body
+UPSTREAM_REQUEST_DURATION = Histogram(
+    'weather_service_upstream_request_duration_seconds',
+    'wttr.in request latency',
+    ['result'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0)
+)
+
+# Gauge: Age of the cached data, computed at scrape time
+CACHE_AGE = Gauge(
+    'weather_service_cache_age_seconds',
+    'Age of the cached weather data (-1 when empty)'
+)
+
+# Gauges: Refresh concurrency - refreshes running and requests blocked on one
+REFRESH_IN_PROGRESS = Gauge(
+    'weather_service_refresh_in_progress',
+    'Cache refreshes currently running'
+)
+REFRESH_WAITERS = Gauge(
+    'weather_service_refresh_waiters',
+    'Requests waiting for a cold-cache refresh to finish'
+)
+
+
+def write_atomic(path, payload):
+    """
+    Write bytes to path via a temporary file and atomic rename, so readers in
+    other workers never see a partially written file.
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.weather-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def save_cache_snapshot():
+    """Persist the current cache contents to the snapshot file."""
+    if not CACHE_SNAPSHOT_FILE or weather_cache['data'] is None:
+        return
+    snapshot = {
+        'data': weather_cache['data'],
+        'timestamp': weather_cache['timestamp'].isoformat()
+    }
+    try:
+        write_atomic(CACHE_SNAPSHOT_FILE, json.dumps(snapshot).encode('utf-8'))
+        weather_cache['snapshot_mtime'] = os.stat(CACHE_SNAPSHOT_FILE).st_mtime_ns
+    except OSError as e:
+        logger.warning('Could not write weather cache snapshot: %s', e)
+
+
+def load_cache_snapshot():
+    """
+    Load the persisted cache if the snapshot changed since it was last read.
+
+    Called at startup, and again while the cache is expired, so a refresh
+    done by another worker is picked up instead of repeated. Loaded data
+    keeps its original timestamp, so expired data is served as stale with
+    its real age until refreshed.
+    """
+    if not CACHE_SNAPSHOT_FILE:
+        return
+    try:
+        mtime = os.stat(CACHE_SNAPSHOT_FILE).st_mtime_ns
+        if mtime == weather_cache['snapshot_mtime']:
+            return
+        with open(CACHE_SNAPSHOT_FILE, 'rb') as snapshot_file:
+            snapshot = json.loads(snapshot_file.read())
+        timestamp = datetime.fromisoformat(snapshot['timestamp'])
+        weather_cache['snapshot_mtime'] = mtime
+        if weather_cache['timestamp'] is not None and timestamp <= weather_cache['timestamp']:
+            return
+        weather_cache['data'] = snapshot['data']
+        weather_cache['timestamp'] = timestamp
+        logger.info('Loaded weather cache snapshot from %s', CACHE_SNAPSHOT_FILE)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning('Ignoring unreadable weather cache snapshot: %s', e)
+
+
 def is_cache_valid():
     """
     Check if cached weather data is still valid based on age.
@@ -49,6 +294,241 @@ def is_cache_valid():
     cache_age = datetime.now() - weather_cache['timestamp']
     return cache_age < timedelta(minutes=weather_cache['cache_duration_minutes'])
 
+
+def cache_age_seconds():
+    """Age of the cached data in whole seconds."""
+    return int((datetime.now() - weather_cache['timestamp']).total_seconds())
+
+
+def _scrape_cache_age():
+    """Cache age for the CACHE_AGE gauge, -1 when nothing is cached."""
+    if weather_cache['timestamp'] is None:
+        return -1
+    return (datetime.now() - weather_cache['timestamp']).total_seconds()
+
+
+CACHE_AGE.set_function(_scrape_cache_age)
+
+
+def fetch_upstream():
+    """
+    Stream the raw wttr.in response body, honouring WEATHER_UPSTREAM_MODE.
+
+    Yields the body in chunks so a caller that has what it needs can stop
+    early; closing the generator closes the upstream connection.
+
+    Yields:
+        bytes: Successive chunks of the upstream JSON document
+
+    Raises:
+        requests.RequestException: If the upstream (real or simulated) is unavailable
+    """
+    if UPSTREAM_MODE == 'outage':
+        raise requests.ConnectionError('Simulated wttr.in outage')
+
+    if UPSTREAM_MODE == 'replay':
+        time.sleep(REPLAY_LATENCY)
+        try:
+            with open(RECORDING_FILE, 'rb') as recording:
+                body = recording.read()
+        except OSError:
+            raise requests.ConnectionError('No recorded wttr.in response to replay')
+        for offset in range(0, len(body), UPSTREAM_CHUNK_SIZE):
+            yield body[offset:offset + UPSTREAM_CHUNK_SIZE]
+        return
+
+    # certifi.where() provides path to trusted CA bundle for SSL verification
+    # stream=True lets the lean decoder stop downloading after current_condition
+    weather_response = requests.get(WEATHER_URL, timeout=5, verify=certifi.where(),
+                                    stream=UPSTREAM_MODE != 'record')
+    try:
+        weather_response.raise_for_status()
+        if UPSTREAM_MODE == 'record':
+            # Recordings always hold the full document so replays match live
+            write_atomic(RECORDING_FILE, weather_response.content)
+        yield from weather_response.iter_content(UPSTREAM_CHUNK_SIZE)
+    finally:
+        weather_response.close()
+
+
+class DecodeStats:
+    """
+    Time and peak traced memory spent in decode steps.
+
+    Tracing is switched on only around each decode of already-buffered bytes,
+    never while waiting on the network, so other request threads are traced
+    for microseconds rather than for the whole refresh.
+
+    Args:
+        trace_memory (bool): Whether to trace allocations during decode steps
+    """
+
+    def __init__(self, trace_memory):
+        self.trace_memory = trace_memory
+        self.seconds = 0.0
+        self.peak_memory = 0
+
+    @contextmanager
+    def measure(self):
+        """Time one decode step (and trace it if enabled)."""
+        if self.trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds += time.perf_counter() - start
+            if self.trace_memory:
+                self.peak_memory = max(self.peak_memory, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+
+
+def decode_current_condition(chunks, stats):
+    """
+    Extract current_condition[0] from a chunked wttr.in JSON document.
+
+    In lean mode the document is decoded incrementally: bytes are buffered
+    only until the current_condition array is complete, then the rest of the
+    download (multi-day hourly forecasts) is abandoned. wttr.in emits
+    current_condition first, so this is typically a few KB out of ~50 KB.
+    If the key cannot be isolated, the full document is decoded instead.
+
+    Args:
+        chunks (iterable): Byte chunks of the upstream document
+        stats (DecodeStats): Accumulates decode time and peak memory
+
+    Returns:
+        tuple: (current_condition dict, bytes read)
+    """
+    buffer = bytearray()
+    array_start = -1
+
+    for chunk in chunks:
+        buffer += chunk
+        if not LEAN_FETCH:
+            continue
+
+        if array_start < 0:
+            key_index = buffer.find(CURRENT_CONDITION_KEY)
+            if key_index < 0:
+                continue
+            array_start = buffer.find(b'[', key_index + len(CURRENT_CONDITION_KEY))
+            if array_start < 0:
+                continue
+
+        try:
+            with stats.measure():
+                conditions, _ = json_decoder.raw_decode(buffer[array_start:].decode('utf-8'))
+        except (ValueError, UnicodeDecodeError):
+            # Array not complete yet (or a multi-byte character was split)
+            continue
+        if hasattr(chunks, 'close'):
+            chunks.close()
+        return (conditions[0] if conditions else {}), len(buffer)
+
+    with stats.measure():
+        weather_data = json.loads(bytes(buffer))
+        current_condition = weather_data.get('current_condition', [{}])[0]
+    return current_condition, len(buffer)
+
+
+@REFRESH_IN_PROGRESS.track_inprogress()
+def refresh_cache():
+    """
+    Fetch fresh weather data from wttr.in and store it in the cache.
+
+    Returns:
+        dict: The freshly built response data
+    """
+    # Hardcoded location for Haifa, Israel
+    # In a production system, this could be configurable or accept query parameters
+    city = 'Haifa'
+    country = 'Israel'
+    latitude = 32.7940
+    longitude = 34.9896
+
+    # tracemalloc is process-wide: with WEATHER_TRACE_DECODE_MEMORY it runs
+    # only around each decode step (see DecodeStats), and the peak can still
+    # include allocations other threads made in that window. Leave tracing
+    # alone if something else already started it.
+    stats = DecodeStats(TRACE_DECODE_MEMORY and not tracemalloc.is_tracing())
+    upstream_start = time.time()
+    try:
+        # Extract current weather condition from API response
+        current_condition, bytes_read = decode_current_condition(fetch_upstream(), stats)
+    except Exception:
+        UPSTREAM_REQUEST_DURATION.labels(result='error').observe(time.time() - upstream_start)
+        raise
+    UPSTREAM_REQUEST_DURATION.labels(result='success').observe(time.time() - upstream_start)
+
+    UPSTREAM_RESPONSE_BYTES.observe(bytes_read)
+    UPSTREAM_DECODE_DURATION.observe(stats.seconds)
+    if stats.trace_memory:
+        UPSTREAM_DECODE_PEAK_MEMORY.set(stats.peak_memory)
+    logger.info('Weather refresh read %d bytes, decoded in %.2f ms, peak decode memory %d bytes',
+                bytes_read, stats.seconds * 1000, stats.peak_memory)
+
+    # Build response object with location and weather data
+    response_data = {
+        'service': 'weather-service',
+        'cached': False,
+        'location': {
+            'city': city,
+            'country': country,
+            'latitude': latitude,
+            'longitude': longitude
+        },
+        'weather': {
+            'temperature_c': current_condition.get('temp_C', 'N/A'),
+            'temperature_f': current_condition.get('temp_F', 'N/A'),
+            'condition': current_condition.get('weatherDesc', [{}])[0].get('value', 'N/A'),
+            'humidity': current_condition.get('humidity', 'N/A'),
+            'wind_speed_kmph': current_condition.get('windspeedKmph', 'N/A'),
+            'feels_like_c': current_condition.get('FeelsLikeC', 'N/A')
+        }
+    }
+
+    # Update cache with fresh data for future requests and persist it
+    weather_cache['data'] = response_data.copy()
+    weather_cache['timestamp'] = datetime.now()
+    save_cache_snapshot()
+
+    return response_data
+
+
+def refresh_in_background():
+    """
+    Refresh the cache on a background thread unless a refresh is already
+    running in any worker. Errors are logged; callers keep serving the stale data.
+    """
+    if not refresh_lock.acquire(blocking=False):
+        return
+
+    def run():
+        try:
+            # Another worker may have refreshed between our check and the lock
+            load_cache_snapshot()
+            if not is_cache_valid():
+                refresh_cache()
+        except Exception as e:
+            logger.warning('Background weather refresh failed: %s', type(e).__name__,
+                           extra={'event': 'upstream_error', 'event_key': 'wttr.in'})
+        finally:
+            refresh_lock.release()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def stale_response(reason):
+    """Build a response from the expired cache, marked stale with its age."""
+    response = weather_cache['data'].copy()
+    response['cached'] = True
+    response['stale'] = True
+    response['cache_age_seconds'] = cache_age_seconds()
+    response['error'] = reason
+    return response
+
+
 @app.route('/api/weather', methods=['GET'])
 def get_weather():
     """
@@ -57,9 +537,13 @@ def get_weather():
     Returns current weather data for Haifa, Israel. Implements a cache-first
     strategy with stale-while-revalidate fallback:
     1. If cache is valid (< 10 minutes old), return cached data immediately
-    2. If cache is invalid/missing, fetch fresh data from wttr.in API
-    3. If API call fails and stale cache exists, return stale data with warning
-    4. If API call fails and no cache exists, return error
+    2. If cache is expired, return it marked stale and refresh in the background
+    3. If there is no cache at all, fetch fresh data from wttr.in API
+    4. If API call fails and stale cache exists, return stale data with warning
+    5. If API call fails and no cache exists, return error
+
+    The cache is persisted to a snapshot file, so after a restart the last-known
+    data is served (as stale) while a single refresh runs.
 
     Uses certifi for SSL certificate verification to handle systems with
     custom CA certificates or outdated certificate bundles.
@@ -68,75 +552,67 @@ def get_weather():
         Response: JSON with weather data (fresh, cached, or stale), or error
                   with 500 status if API fails with no cache available
     """
-    try:
-        # Return cached data if still valid (cache hit)
-        if is_cache_valid():
-            cached_response = weather_cache['data'].copy()
-            cached_response['cached'] = True
-            cached_response['cache_age_seconds'] = int((datetime.now() - weather_cache['timestamp']).total_seconds())
-            return jsonify(cached_response)
-
-        # Cache miss - need to fetch fresh data
-        # Hardcoded location for Haifa, Israel
-        # In a production system, this could be configurable or accept query parameters
-        city = 'Haifa'
-        country = 'Israel'
-        latitude = 32.7940
-        longitude = 34.9896
-
-        # Fetch weather data from wttr.in API
-        # format=j1 returns JSON format with comprehensive weather data
-        # certifi.where() provides path to trusted CA bundle for SSL verification
-        weather_url = f'https://wttr.in/Haifa,Israel?format=j1'
-        weather_response = requests.get(weather_url, timeout=5, verify=certifi.where())
-        weather_data = weather_response.json()
+    start_time = time.time()
+    payload, status, outcome = lookup_weather()
 
-        # Extract current weather condition from API response
-        # Use .get() with defaults to handle missing data gracefully
-        current_condition = weather_data.get('current_condition', [{}])[0]
+    # Record latency by cache outcome (overall RED metrics come from REDMiddleware)
+    WEATHER_REQUEST_DURATION.labels(cache=outcome).observe(time.time() - start_time)
 
-        # Build response object with location and weather data
-        response_data = {
-            'service': 'weather-service',
-            'cached': False,
-            'location': {
-                'city': city,
-                'country': country,
-                'latitude': latitude,
-                'longitude': longitude
-            },
-            'weather': {
-                'temperature_c': current_condition.get('temp_C', 'N/A'),
-                'temperature_f': current_condition.get('temp_F', 'N/A'),
-                'condition': current_condition.get('weatherDesc', [{}])[0].get('value', 'N/A'),
-                'humidity': current_condition.get('humidity', 'N/A'),
-                'wind_speed_kmph': current_condition.get('windspeedKmph', 'N/A'),
-                'feels_like_c': current_condition.get('FeelsLikeC', 'N/A')
-            }
-        }
+    return jsonify(payload), status
 
-        # Update cache with fresh data for future requests
-        weather_cache['data'] = response_data.copy()
-        weather_cache['timestamp'] = datetime.now()
 
-        return jsonify(response_data)
-    except Exception as e:
-        # Error handling: Implement stale-while-revalidate pattern
-        # If we have cached data (even if expired), return it during errors
-        # This provides better UX than showing an error when we have some data
-        if weather_cache['data'] is not None:
-            stale_response = weather_cache['data'].copy()
-            stale_response['cached'] = True
-            stale_response['stale'] = True
-            stale_response['error'] = f'Using stale cache due to error: {str(e)}'
-            return jsonify(stale_response)
+def lookup_weather():
+    """
+    Resolve a weather request against the cache, refreshing as needed.
+
+    Returns:
+        tuple: (response payload, HTTP status, cache outcome label)
+    """
+    # Another worker may have refreshed an expired cache; a stat when unchanged
+    if not is_cache_valid():
+        load_cache_snapshot()
+
+    # Return cached data if still valid (cache hit)
+    if is_cache_valid():
+        CACHE_HITS.inc()
+        cached_response = weather_cache['data'].copy()
+        cached_response['cached'] = True
+        cached_response['cache_age_seconds'] = cache_age_seconds()
+        return cached_response, 200, 'cached'
 
+    CACHE_MISSES.inc()
+
+    # Expired data - serve it right away while one refresh runs
+    if weather_cache['data'] is not None:
+        refresh_in_background()
+        return stale_response('Serving stale cache while refreshing'), 200, 'stale'
+
+    # Cold cache - need to fetch fresh data before we can answer
+    try:
+        with REFRESH_WAITERS.track_inprogress():
+            refresh_lock.acquire()
+        try:
+            # Another request or worker may have filled the cache while we waited
+            load_cache_snapshot()
+            if weather_cache['data'] is not None:
+                cached_response = weather_cache['data'].copy()
+                cached_response['cached'] = True
+                cached_response['cache_age_seconds'] = cache_age_seconds()
+                return cached_response, 200, 'cached'
+            return refresh_cache(), 200, 'fresh'
+        finally:
+            refresh_lock.release()
+    except Exception as e:
         # No cache available - return error response
-        return jsonify({
+        return {
             'service': 'weather-service',
             'error': str(e),
             'message': 'Could not fetch weather data'
-        }), 500
+        }, 500, 'error'
+
+
+# Start warm from the last snapshot written by any previous process
+load_cache_snapshot()
 
 @app.route('/health', methods=['GET'])
 def health():
@@ -151,6 +627,28 @@ def health():
     """
     return jsonify({'status': 'healthy'})
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Prometheus metrics endpoint.
+
+    Exposes all collected Prometheus metrics in a format that can be scraped
+    by Prometheus server for monitoring and alerting.
+
+    Returns:
+        Response: Prometheus-formatted metrics in plain text
+    """
+    return generate_latest(), 200, {'Content-Type': CONTENT_TYPE_LATEST}
+
+# ============================================================================
+# Request Instrumentation
+# ============================================================================
+# Off unless FAULT_INJECTION_ENABLED; must precede REDMiddleware to be counted
+install_fault_injection(app, 'weather_service')
+
+# Installed last so every route's metric children are resolved up front
+REDMiddleware(app, 'weather_service')
+
 # ============================================================================
 # Application Entry Point
 # ============================================================================